@@ -3,7 +3,28 @@
 Entry point for running the app package directly
 """
 
+import sys
+
 import uvicorn
 
+# uvloop has no Windows build; httptools does
+LOOP = "asyncio" if sys.platform == "win32" else "uvloop"
+
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop=LOOP,
+        http="httptools",
+        # Stream frames are a few hundred bytes at most; deflating them
+        # costs more CPU than it saves on the wire
+        ws="websockets",
+        ws_per_message_deflate=False,
+        reload=True,
+        # Skip per-request logging, proxy header rewriting and default headers
+        access_log=False,
+        proxy_headers=False,
+        server_header=False,
+        date_header=False,
+    )
@@ -0,0 +1,94 @@
+"""
+Compiled per-hit scoring kernels used by the analyzer
+"""
+
+import numpy as np
+from numba import njit, boolean, float64, int64, types
+
+
+@njit(float64(float64, float64, float64, float64, float64), cache=True, fastmath=True)
+def timing_score(abs_delta: float, ok_ms: float, poor_ms: float,
+                 inv_ok_perfect: float, inv_poor_ok: float) -> float:
+    """Timing score for an absolute delta from the grid
+
+    Branchless sum of two clamped ramps: 1.0 down to 0.8 between the
+    perfect and ok thresholds, then 0.8 down to 0.0 up to the poor one.
+    """
+    perfect_ramp = min(1.0, max(0.0, (ok_ms - abs_delta) * inv_ok_perfect))
+    poor_ramp = min(1.0, max(0.0, (poor_ms - abs_delta) * inv_poor_ok))
+    return 0.2 * perfect_ramp + 0.8 * poor_ramp
+
+
+@njit(float64(int64, int64, int64), cache=True, fastmath=True)
+def dyn_score(velocity: int, target_velocity: int, tolerance: int) -> float:
+    """Dynamics score for a velocity against its target"""
+    diff = abs(velocity - target_velocity)
+
+    if diff <= tolerance:
+        return 1.0
+
+    # Linear falloff beyond tolerance
+    max_diff = 127  # MIDI velocity range
+    return max(0.0, 1.0 - (diff - tolerance) / (max_diff - tolerance))
+
+
+@njit(types.UniTuple(float64, 4)(float64, float64, float64, float64, float64, float64, float64),
+      cache=True, fastmath=True)
+def update_rolling(timing_mean: float, timing_var: float, dyn_target: float, dyn_var: float,
+                   timing_score: float, dyn_score: float, alpha: float):
+    """EWMA update of the four rolling scores, returned in the same order"""
+    return (
+        (1 - alpha) * timing_mean + alpha * timing_score,
+        (1 - alpha) * timing_var + alpha * (1.0 - timing_score),
+        (1 - alpha) * dyn_target + alpha * dyn_score,
+        (1 - alpha) * dyn_var + alpha * (1.0 - dyn_score),
+    )
+
+
+@njit(types.Tuple((int64[:], float64[:], int64[:], float64[:], float64[:]))(
+          float64[:], int64[:], boolean[:], float64, float64, int64,
+          float64, float64, float64, float64, int64, int64, int64),
+      cache=True, fastmath=True)
+def score_hits(elapsed_ms, velocities, accent_mask, start_time, ms_per_subdivision, total_slots,
+               ok_ms, poor_ms, inv_ok_perfect, inv_poor_ok, accent_target, tap_target, tolerance):
+    """Nearest slot, delta and both scores for a batch of hits
+    
+    Returns (slots, deltas, velocity targets, timing scores, dynamics scores).
+    """
+    n = elapsed_ms.shape[0]
+    slots = np.empty(n, dtype=np.int64)
+    deltas = np.empty(n, dtype=np.float64)
+    targets = np.empty(n, dtype=np.int64)
+    timing_scores = np.empty(n, dtype=np.float64)
+    dyn_scores = np.empty(n, dtype=np.float64)
+    
+    total_grid_duration = (total_slots - 1) * ms_per_subdivision
+    accents_len = accent_mask.shape[0]
+    for i in range(n):
+        relative_time = elapsed_ms[i] % total_grid_duration if total_grid_duration > 0 else 0.0
+        slot_idx = int(np.rint((relative_time - start_time) / ms_per_subdivision))
+        slot_idx = min(max(slot_idx, 0), total_slots - 1)
+        delta_ms = relative_time - (start_time + slot_idx * ms_per_subdivision)
+        target_velocity = accent_target if accent_mask[slot_idx % accents_len] else tap_target
+        
+        slots[i] = slot_idx
+        deltas[i] = delta_ms
+        targets[i] = target_velocity
+        timing_scores[i] = timing_score(abs(delta_ms), ok_ms, poor_ms, inv_ok_perfect, inv_poor_ok)
+        dyn_scores[i] = dyn_score(velocities[i], target_velocity, tolerance)
+    
+    return slots, deltas, targets, timing_scores, dyn_scores
+
+
+def warmup():
+    """Run each kernel once so nothing is left to resolve on the first hit"""
+    timing_score(0.0, 2.0, 3.0, 1.0, 1.0)
+    dyn_score(0, 0, 0)
+    update_rolling(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.1)
+    score_hits(np.zeros(1), np.zeros(1, dtype=np.int64), np.ones(1, dtype=np.bool_),
+               0.0, 1.0, 1, 2.0, 3.0, 1.0, 1.0, 0, 0, 0)
+
+
+# The explicit signatures above compile eagerly at import (or load from the
+# on-disk cache); warming up here also loads the native code before any session
+warmup()
@@ -1,7 +1,9 @@
 import numpy as np
 import time
-from typing import List, Dict, Tuple, Optional
-from .models import Drill, HitEvent, HitFeedback, TakeMetrics
+from math import log, exp
+from typing import Any, List, Dict, Tuple, Optional
+from .models import AudioHit, Drill, HitEvent, HitFeedback, TakeMetrics
+from . import _kernels
 
 class DrumAnalyzer:
     """Core analyzer for drum timing and dynamics"""
@@ -12,17 +14,29 @@ class DrumAnalyzer:
         self.current_tempo_bpm  = drill.tempo_bpm  # Track current tempo
         self.session_start_time = None  # Track when session started
         
-        # Precompute grid times
-        self.grid_times = self._compute_grid_times()
-        
-        # Rolling statistics
-        self.deltas = []
-        self.velocities = []
+        # Describe the grid by its start, spacing and length
+        self._compute_grid()
+        
+        # Cache the drill's dynamics settings as primitives for the per-hit path
+        self._accents = tuple(bool(accent) for accent in drill.accents)
+        self._accents_len = len(self._accents)
+        self._accent_mask = np.array(self._accents, dtype=bool)
+        self._accent_target = drill.velocity_targets.accent
+        self._tap_target = drill.velocity_targets.tap
+        self._tolerance = drill.velocity_targets.tolerance
+        
+        # Rolling statistics, in buffers that grow geometrically as hits arrive
+        self._deltas = np.empty(1024, dtype=np.float64)
+        self._dyn_scores = np.empty(1024, dtype=np.float64)
+        self._n = 0
         self.hit_slots = set()
         
         # EWMA parameters for rolling scores
         self.alpha = 0.1  # smoothing factor
         
+        # Diamond score weights per axis: timing, timing consistency, dynamics, dynamics consistency
+        self._diamond_weights = (0.35, 0.25, 0.25, 0.15)
+        
         # Current rolling scores
         self.rolling_timing_mean = 0.0
         self.rolling_timing_var = 0.0
@@ -35,32 +49,29 @@ class DrumAnalyzer:
         print(f"Session started at: {self.session_start_time}")
     
     def update_tempo(self, new_tempo_bpm: int):
-        """Update the current tempo and recompute grid times"""
+        """Update the current tempo and recompute the grid"""
         self.current_tempo_bpm = new_tempo_bpm
-        self.grid_times = self._compute_grid_times()
+        self._compute_grid()
         print(f"Analyzer tempo updated to {new_tempo_bpm} BPM, grid recomputed")
     
-    def _compute_grid_times(self) -> np.ndarray:
+    def _compute_grid(self):
         """Compute the time grid for the drill using current tempo"""
         # Use relative timing starting from 0ms - much simpler and more reliable
-        start_time = 0.0  # Start from 0ms
+        self.start_time = 0.0  # Start from 0ms
         
         # Convert BPM to milliseconds per beat
         ms_per_beat = 60000.0 / self.current_tempo_bpm
         
         # Time per subdivision
-        ms_per_subdivision = ms_per_beat / self.drill.subdivision
+        self.ms_per_subdivision = ms_per_beat / self.drill.subdivision
         
         # Total slots in the drill
-        total_slots = self.drill.beats_per_bar * self.drill.bars * self.drill.subdivision
-        
-        # Create grid starting from 0ms
-        grid = np.array([start_time + i * ms_per_subdivision for i in range(total_slots)], dtype=np.float64)
+        self.total_slots = self.drill.beats_per_bar * self.drill.bars * self.drill.subdivision
         
-        print(f"Grid computed: {total_slots} slots, {ms_per_subdivision:.2f}ms per subdivision")
-        print(f"Grid spans: 0ms to {grid[-1]:.2f}ms")
+        print(f"Grid computed: {self.total_slots} slots, {self.ms_per_subdivision:.2f}ms per subdivision")
+        print(f"Grid spans: 0ms to {(self.total_slots - 1) * self.ms_per_subdivision:.2f}ms")
         
-        return grid
+        self._compute_timing_thresholds()
     
     def _find_nearest_slot(self, hit_time_ms: float) -> Tuple[int, float]:
         """Find the nearest grid slot and return (slot_index, delta_ms)"""
@@ -73,8 +84,8 @@ class DrumAnalyzer:
         session_elapsed_ms = (time.time() - self.session_start_time) * 1000.0
         
         # Calculate relative position within the grid cycle
-        total_grid_duration = self.grid_times[-1]  # Total duration in ms
-        relative_time = session_elapsed_ms % total_grid_duration
+        total_grid_duration = (self.total_slots - 1) * self.ms_per_subdivision  # Total duration in ms
+        relative_time = session_elapsed_ms % total_grid_duration if total_grid_duration > 0 else 0.0
         
         # Debug timing information
         print(f"Hit timing debug:")
@@ -82,28 +93,27 @@ class DrumAnalyzer:
         print(f"  Session elapsed: {session_elapsed_ms:.2f}ms")
         print(f"  Total grid duration: {total_grid_duration:.2f}ms")
         print(f"  Relative time: {relative_time:.2f}ms")
-        print(f"  Grid start: {self.grid_times[0]:.2f}ms")
-        print(f"  Grid end: {self.grid_times[-1]:.2f}ms")
+        print(f"  Grid start: {self.start_time:.2f}ms")
+        print(f"  Grid end: {self.start_time + total_grid_duration:.2f}ms")
         
-        # Find nearest slot
-        slot_idx = int(np.argmin(np.abs(self.grid_times - relative_time)))
-        delta_ms = float(relative_time - self.grid_times[slot_idx])
+        # Find nearest slot - the grid is uniform, so round instead of searching it
+        slot_idx = int(round((relative_time - self.start_time) / self.ms_per_subdivision))
+        if slot_idx < 0:
+            slot_idx = 0
+        elif slot_idx >= self.total_slots:
+            slot_idx = self.total_slots - 1
+        delta_ms = relative_time - (self.start_time + slot_idx * self.ms_per_subdivision)
         
         print(f"  Nearest slot: {slot_idx}, Delta: {delta_ms:.2f}ms")
         
         return slot_idx, delta_ms
     
-    def _calculate_timing_score(self, delta_ms: float) -> float:
-        """Calculate timing score based on delta from grid using relative thresholds"""
-        abs_delta = abs(delta_ms)
-        
-        # Calculate subdivision timing in milliseconds based on current tempo
-        subdivision_ms = (60.0 / self.current_tempo_bpm) * 1000.0 / self.drill.subdivision
-        
-        # Calculate absolute thresholds from relative percentages
-        perfect_ms = subdivision_ms * self.drill.timing.perfect_pct
-        ok_ms = subdivision_ms * self.drill.timing.ok_pct
-        poor_ms = subdivision_ms * self.drill.timing.poor_pct
+    def _compute_timing_thresholds(self):
+        """Precompute absolute timing thresholds for the current tempo"""
+        # Calculate absolute thresholds from relative percentages of the subdivision
+        perfect_ms = self.ms_per_subdivision * self.drill.timing.perfect_pct
+        ok_ms = self.ms_per_subdivision * self.drill.timing.ok_pct
+        poor_ms = self.ms_per_subdivision * self.drill.timing.poor_pct
         
         # Fallback to legacy absolute thresholds if relative ones aren't set
         if self.drill.timing.ok_ms is not None:
@@ -113,89 +123,123 @@ class DrumAnalyzer:
         if self.drill.timing.bad_ms is not None:
             poor_ms = self.drill.timing.bad_ms
         
-        if abs_delta <= perfect_ms:
-            return 1.0
-        elif abs_delta <= ok_ms:
-            # Linear interpolation between perfect and ok
-            ratio = (ok_ms - abs_delta) / (ok_ms - perfect_ms)
-            return 0.8 + 0.2 * ratio
-        elif abs_delta <= poor_ms:
-            # Linear interpolation between ok and poor
-            ratio = (poor_ms - abs_delta) / (poor_ms - ok_ms)
-            return 0.0 + 0.8 * ratio
-        else:
-            return 0.0
+        # Store the reciprocals of both ramps so scoring needs no divisions
+        self._ok_ms = float(ok_ms)
+        self._poor_ms = float(poor_ms)
+        self._inv_ok_perfect = 1.0 / max(ok_ms - perfect_ms, 1e-9)
+        self._inv_poor_ok = 1.0 / max(poor_ms - ok_ms, 1e-9)
+    
+    def _calculate_timing_score(self, delta_ms: float) -> float:
+        """Calculate timing score based on delta from grid using relative thresholds"""
+        return _kernels.timing_score(
+            abs(delta_ms), self._ok_ms, self._poor_ms, self._inv_ok_perfect, self._inv_poor_ok
+        )
     
     def _calculate_dynamics_score(self, velocity: int, slot_idx: int) -> Tuple[float, int]:
         """Calculate dynamics score based on velocity vs target"""
         # Determine if this slot should be accented
-        pattern_length = len(self.drill.accents)
-        accent_value = self.drill.accents[slot_idx % pattern_length]
-        
-        if accent_value:
-            target_velocity = self.drill.velocity_targets.accent
+        if self._accents[slot_idx % self._accents_len]:
+            target_velocity = self._accent_target
         else:
-            target_velocity = self.drill.velocity_targets.tap
+            target_velocity = self._tap_target
         
         # Calculate score based on how close velocity is to target
-        tolerance = self.drill.velocity_targets.tolerance
-        diff = abs(velocity - target_velocity)
-        
-        if diff <= tolerance:
-            score = 1.0
-        else:
-            # Linear falloff beyond tolerance
-            max_diff = 127  # MIDI velocity range
-            score = max(0.0, 1.0 - (diff - tolerance) / (max_diff - tolerance))
+        score = _kernels.dyn_score(velocity, target_velocity, self._tolerance)
         
         return score, target_velocity
     
     def _update_rolling_scores(self, timing_score: float, dyn_score: float):
         """Update rolling scores using EWMA"""
-        # Update timing scores
-        self.rolling_timing_mean = (1 - self.alpha) * self.rolling_timing_mean + self.alpha * timing_score
-        self.rolling_timing_var = (1 - self.alpha) * self.rolling_timing_var + self.alpha * (1.0 - timing_score)
-        
-        # Update dynamics scores
-        self.rolling_dyn_target = (1 - self.alpha) * self.rolling_dyn_target + self.alpha * dyn_score
-        self.rolling_dyn_var = (1 - self.alpha) * self.rolling_dyn_var + self.alpha * (1.0 - dyn_score)
+        (
+            self.rolling_timing_mean,
+            self.rolling_timing_var,
+            self.rolling_dyn_target,
+            self.rolling_dyn_var,
+        ) = _kernels.update_rolling(
+            self.rolling_timing_mean,
+            self.rolling_timing_var,
+            self.rolling_dyn_target,
+            self.rolling_dyn_var,
+            timing_score,
+            dyn_score,
+            self.alpha,
+        )
     
-    def _calculate_diamond_score(self) -> float:
+    def _rolling_scores(self) -> Tuple[float, float, float, float]:
+        """The four rolling scores, read together"""
+        return (self.rolling_timing_mean, self.rolling_timing_var,
+                self.rolling_dyn_target, self.rolling_dyn_var)
+    
+    def _calculate_diamond_score(self, rolling: Optional[Tuple[float, float, float, float]] = None) -> float:
         """Calculate the diamond score using geometric mean of four axes"""
+        timing_mean, timing_var, dyn_target, dyn_var = rolling if rolling is not None else self._rolling_scores()
+        
         # Ensure all scores are positive (avoid log(0))
-        axes = np.array([
-            max(1e-6, self.rolling_timing_mean),
-            max(1e-6, 1.0 - self.rolling_timing_var),  # Invert variance (lower is better)
-            max(1e-6, self.rolling_dyn_target),
-            max(1e-6, 1.0 - self.rolling_dyn_var)      # Invert variance (lower is better)
-        ], dtype=np.float64)
-        
-        # Weights for each axis
-        weights = np.array([0.35, 0.25, 0.25, 0.15])
-        
-        # Geometric mean
-        log_axes = np.log(axes)
-        weighted_sum = np.sum(weights * log_axes)
-        total_weight = np.sum(weights)
-        
-        diamond_score = float(np.exp(weighted_sum / total_weight))
-        return diamond_score
+        w_timing, w_timing_var, w_dyn, w_dyn_var = self._diamond_weights
+        
+        # Geometric mean (weights sum to 1, so no normalisation is needed)
+        weighted_sum = (
+            w_timing * log(max(1e-6, timing_mean))
+            + w_timing_var * log(max(1e-6, 1.0 - timing_var))  # Invert variance (lower is better)
+            + w_dyn * log(max(1e-6, dyn_target))
+            + w_dyn_var * log(max(1e-6, 1.0 - dyn_var))        # Invert variance (lower is better)
+        )
+        
+        return exp(weighted_sum)
+    
+    def _append_hit(self, delta_ms: float, dyn_score: float):
+        """Store a hit's delta and dynamics score, growing the buffers when full"""
+        if self._n == len(self._deltas):
+            self._deltas = np.resize(self._deltas, 2 * self._n)
+            self._dyn_scores = np.resize(self._dyn_scores, 2 * self._n)
+        
+        self._deltas[self._n] = delta_ms
+        self._dyn_scores[self._n] = dyn_score
+        self._n += 1
+    
+    def _append_hits(self, deltas: np.ndarray, dyn_scores: np.ndarray):
+        """Store a batch of hits at once, growing the buffers to fit"""
+        end = self._n + len(deltas)
+        if end > len(self._deltas):
+            size = max(end, 2 * len(self._deltas))
+            self._deltas = np.resize(self._deltas, size)
+            self._dyn_scores = np.resize(self._dyn_scores, size)
+        
+        self._deltas[self._n:end] = deltas
+        self._dyn_scores[self._n:end] = dyn_scores
+        self._n = end
     
     def process_midi_hit(self, hit: HitEvent) -> HitFeedback:
         """Process a MIDI hit event and return feedback"""
         if hit.type != "midi" or hit.velocity is None:
             raise ValueError("Invalid MIDI hit event")
         
+        return self.process_midi_raw(hit.t, hit.note, hit.velocity)
+    
+    def process_midi_raw(self, t: float, note: Optional[int], velocity: int) -> HitFeedback:
+        """Process a MIDI hit given as raw scalars, without building a HitEvent
+        
+        The caller must guarantee the fields are valid: nothing is validated,
+        and the feedback is built with model_construct since the analyzer
+        produced every field of it.
+        """
+        return HitFeedback.model_construct(**self.process_midi_hit_fast(t, velocity))
+    
+    def process_midi_hit_fast(self, t: float, velocity: int) -> Dict[str, Any]:
+        """Process an already-validated MIDI hit given as plain scalars
+        
+        Returns the feedback as a plain dict shaped like HitFeedback so the
+        WebSocket hot path never instantiates the model.
+        """
         # Find nearest slot and calculate timing
-        slot_idx, delta_ms = self._find_nearest_slot(hit.t)
+        slot_idx, delta_ms = self._find_nearest_slot(t)
         
         # Calculate scores
         timing_score = self._calculate_timing_score(delta_ms)
-        dyn_score, target_velocity = self._calculate_dynamics_score(hit.velocity, slot_idx)
+        dyn_score, target_velocity = self._calculate_dynamics_score(velocity, slot_idx)
         
         # Store data for rolling calculations
-        self.deltas.append(delta_ms)
-        self.velocities.append(hit.velocity)
+        self._append_hit(delta_ms, dyn_score)
         self.hit_slots.add(slot_idx)
         
         # Update rolling scores
@@ -205,24 +249,73 @@ class DrumAnalyzer:
         diamond_score = self._calculate_diamond_score()
         
         # Create feedback
-        feedback = HitFeedback(
-            type="hit_feedback",
-            slot_idx=slot_idx,
-            delta_ms=delta_ms,
-            velocity=hit.velocity,
-            velocity_target=target_velocity,
-            timing_score=timing_score,
-            dyn_score=dyn_score,
-            rolling={
-                "timing": float((self.rolling_timing_mean + (1.0 - self.rolling_timing_var)) / 2.0),
-                "dynamics": float((self.rolling_dyn_target + (1.0 - self.rolling_dyn_var)) / 2.0),
+        return {
+            "type": "hit_feedback",
+            "slot_idx": slot_idx,
+            "delta_ms": delta_ms,
+            "velocity": velocity,
+            "velocity_target": target_velocity,
+            "timing_score": timing_score,
+            "dyn_score": dyn_score,
+            "rolling": {
+                "timing": (self.rolling_timing_mean + (1.0 - self.rolling_timing_var)) / 2.0,
+                "dynamics": (self.rolling_dyn_target + (1.0 - self.rolling_dyn_var)) / 2.0,
                 "diamond": diamond_score
             }
+        }
+    
+    def process_batch(self, times: np.ndarray, velocities: np.ndarray) -> List[Dict[str, Any]]:
+        """Process a batch of already-validated MIDI hits given as arrays
+        
+        The newest hit is placed at the current session time and the others
+        by their client-time offsets from it. Slots, deltas and both scores
+        come from one compiled kernel call; only the rolling scores, which
+        depend on every previous hit, are updated hit by hit. Returns one
+        HitFeedback-shaped dict per hit, in order.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        velocities = np.asarray(velocities, dtype=np.int64)
+        if len(times) == 0:
+            return []
+        
+        if self.session_start_time is None:
+            self.start_session()
+        session_elapsed_ms = (time.time() - self.session_start_time) * 1000.0
+        elapsed = session_elapsed_ms - (times.max() - times)
+        
+        slots, deltas, targets, timing_scores, dyn_scores = _kernels.score_hits(
+            elapsed, velocities, self._accent_mask,
+            self.start_time, self.ms_per_subdivision, self.total_slots,
+            self._ok_ms, self._poor_ms, self._inv_ok_perfect, self._inv_poor_ok,
+            self._accent_target, self._tap_target, self._tolerance,
         )
         
+        self._append_hits(deltas, dyn_scores)
+        self.hit_slots.update(slots.tolist())
+        
+        feedback = []
+        for slot_idx, delta_ms, velocity, target_velocity, timing_score, dyn_score in zip(
+            slots.tolist(), deltas.tolist(), velocities.tolist(), targets.tolist(),
+            timing_scores.tolist(), dyn_scores.tolist(),
+        ):
+            self._update_rolling_scores(timing_score, dyn_score)
+            feedback.append({
+                "type": "hit_feedback",
+                "slot_idx": slot_idx,
+                "delta_ms": delta_ms,
+                "velocity": velocity,
+                "velocity_target": target_velocity,
+                "timing_score": timing_score,
+                "dyn_score": dyn_score,
+                "rolling": {
+                    "timing": (self.rolling_timing_mean + (1.0 - self.rolling_timing_var)) / 2.0,
+                    "dynamics": (self.rolling_dyn_target + (1.0 - self.rolling_dyn_var)) / 2.0,
+                    "diamond": self._calculate_diamond_score()
+                }
+            })
         return feedback
     
-    def process_audio_frame(self, hit: HitEvent) -> Optional[HitFeedback]:
+    def process_audio_frame(self, hit: AudioHit) -> Optional[HitFeedback]:
         """Process an audio frame for onset detection (placeholder for now)"""
         # TODO: Implement onset detection
         # For now, return None to indicate no hit detected
@@ -230,7 +323,14 @@ class DrumAnalyzer:
     
     def get_final_metrics(self) -> TakeMetrics:
         """Get final metrics for the session"""
-        if not self.deltas:
+        # Read the hit count and rolling scores once, so every figure below
+        # describes the same hits even if more arrive meanwhile
+        n = self._n
+        rolling = self._rolling_scores()
+        deltas = self._deltas[:n]
+        dyn_scores = self._dyn_scores[:n]
+        
+        if n == 0:
             return TakeMetrics(
                 timing_mean=0.0,
                 timing_std=0.0,
@@ -238,28 +338,22 @@ class DrumAnalyzer:
                 dynamics_std=0.0,
                 diamond_score=0.0,
                 total_hits=0,
-                missed_slots=len(self.grid_times)
+                missed_slots=self.total_slots
             )
         
         # Calculate final statistics
-        timing_mean = float(np.mean(self.deltas))
-        timing_std = float(np.std(self.deltas))
-        
-        # Calculate dynamics scores for all hits
-        dyn_scores = []
-        for i, velocity in enumerate(self.velocities):
-            slot_idx = i  # This is simplified - in reality we'd track slot mapping
-            score, _ = self._calculate_dynamics_score(velocity, slot_idx)
-            dyn_scores.append(score)
+        timing_mean = float(np.mean(deltas))
+        timing_std = float(np.std(deltas))
         
+        # Dynamics scores were stored per hit against each hit's own slot
         dynamics_target = float(np.mean(dyn_scores))
         dynamics_std = float(np.std(dyn_scores))
         
         # Calculate final diamond score
-        final_diamond = self._calculate_diamond_score()
+        final_diamond = self._calculate_diamond_score(rolling)
         
         # Count missed slots
-        missed_slots = len(self.grid_times) - len(self.hit_slots)
+        missed_slots = self.total_slots - len(self.hit_slots)
         
         return TakeMetrics(
             timing_mean=timing_mean,
@@ -267,7 +361,7 @@ class DrumAnalyzer:
             dynamics_target=dynamics_target,
             dynamics_std=dynamics_std,
             diamond_score=final_diamond,
-            total_hits=len(self.deltas),
+            total_hits=n,
             missed_slots=missed_slots
         )
     
@@ -1,33 +1,74 @@
 import asyncio
-import json
-import uuid
-import time
+import msgspec
+import orjson
+import secrets
 from datetime import datetime, timezone
-from typing import Dict, Optional
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from typing import Any, Dict, List, Optional, Union
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import ValidationError
+from pydantic import TypeAdapter
 
-from .models import Drill, SessionCreate, Session, HitEvent, HitFeedback, DrillList, MetronomeState, MetronomeTick, DrillTempoUpdate
+from .models import Drill, SessionCreate, Session, HitFeedback, DrillList, MetronomeState, MetronomeTick, DrillTempoUpdate
+from .models import StreamMessage, MidiHit, AudioHit, MetronomeCtl, Calibration
+from . import protocol
 from .analyzer import DrumAnalyzer
+from .store import TTLStore
 
 # In-memory storage for MVP (replace with database later)
+# The session store is bounded so abandoned sessions don't accumulate
+SESSION_TTL_S = 3600.0
+SESSION_SWEEP_INTERVAL_S = 60.0
+
+class SessionCtx:
+    """Per-session state, kept together under one key"""
+    __slots__ = ("session", "analyzer", "metronome")
+
+    def __init__(self, session: Session, analyzer: DrumAnalyzer):
+        self.session = session
+        self.analyzer: Optional[DrumAnalyzer] = analyzer  # None once the take is finalized
+        self.metronome: Optional['Metronome'] = None  # set while a stream is connected
+
 drills_db: Dict[str, Drill] = {}
-sessions_db: Dict[str, Session] = {}
-analyzers_db: Dict[str, DrumAnalyzer] = {}
-metronomes_db: Dict[str, 'Metronome'] = {}
+# A session with a connected stream is never evicted, however long the take runs
+sessions_db: TTLStore[SessionCtx] = TTLStore(
+    maxsize=10_000, ttl=SESSION_TTL_S, keep=lambda ctx: ctx.metronome is not None
+)
+
+# Drills rarely change, so the read endpoints serve pre-encoded JSON.
+# Rebuilt by cache_drill_json() whenever drills_db is written.
+drill_json_cache: Dict[str, bytes] = {}
+drill_list_json = b""
+# Opening bytes of each drill's session_start frame, up to the per-session fields
+session_start_prefix: Dict[str, bytes] = {}
+
+# Decoder for inbound stream messages, built once
+STREAM_DECODER = msgspec.json.Decoder(StreamMessage)
+
+# Serializers for the outbound models, built once; dump_json goes straight to bytes
+METRONOME_STATE_ADAPTER = TypeAdapter(MetronomeState)
+HIT_FEEDBACK_ADAPTER = TypeAdapter(HitFeedback)
+
+# Inbound frames wait in a per-connection queue; whatever has piled up is
+# handled in one pass, up to FEEDBACK_BATCH_MAX frames
+INBOX_MAX = 256
+FEEDBACK_BATCH_MAX = 64
 
 class Metronome:
     """Metronome class for generating click sounds and timing"""
     
-    def __init__(self, drill: Drill, custom_tempo_bpm: Optional[int] = None):
+    def __init__(self, ctx: SessionCtx, drill: Drill, custom_tempo_bpm: Optional[int] = None):
+        self.ctx = ctx
         self.drill = drill
         self.custom_tempo_bpm = custom_tempo_bpm
         self.is_playing = False
         self.current_beat = 0
         self.current_subdivision = 0
         self.start_time = None
-        self.task = None
+        self.subdivision_interval = None  # seconds, at the tempo currently playing
+        self.task = None  # one task per metronome, started on first use
+        self._wake = asyncio.Event()  # set on start/stop so the task re-checks its state
+        self._closed = False
         
     @property
     def effective_tempo(self) -> int:
@@ -42,16 +83,29 @@ class Metronome:
         self.is_playing = True
         self.current_beat = 0
         self.current_subdivision = 0
-        self.start_time = time.time()
+        # Monotonic loop clock, so wall-clock adjustments can't shift the beat
+        self.start_time = asyncio.get_running_loop().time()
+        self.subdivision_interval = 60.0 / self.effective_tempo / self.drill.subdivision
         
-        # Start the metronome task
-        self.task = asyncio.create_task(self._run_metronome(websocket))
+        # The metronome task outlives stop/start, so it is only ever created once
+        if self.task is None:
+            self.task = asyncio.create_task(self._run_metronome(websocket))
+        self._wake.set()
         
     async def stop(self):
         """Stop the metronome"""
+        if self.is_playing:
+            self._sync_position()
         self.is_playing = False
+        self._wake.set()
+        
+    async def close(self):
+        """Stop the metronome and wait for its task to end"""
+        # The flag ends the task even if wait_for swallows the cancellation
+        self._closed = True
+        await self.stop()
         if self.task:
-            self.task.cancel()
+            await cancel_and_wait(self.task)
             self.task = None
             
     async def reset(self):
@@ -64,79 +118,154 @@ class Metronome:
         """Update the metronome tempo dynamically"""
         print(f"Updating metronome tempo from {self.effective_tempo} to {new_tempo_bpm} BPM")
         
-        if self.is_playing:
-            # If metronome is playing, restart it with new tempo
-            await self.stop()
-            self.custom_tempo_bpm = new_tempo_bpm
-            print(f"Metronome stopped and tempo updated to {new_tempo_bpm} BPM")
-            # Note: User needs to start again with new tempo
-        else:
-            # If not playing, just update the tempo
-            self.custom_tempo_bpm = new_tempo_bpm
-            print(f"Metronome tempo updated to {new_tempo_bpm} BPM")
+        # A running metronome switches at its next bar without losing its place
+        self.custom_tempo_bpm = new_tempo_bpm
+        print(f"Metronome tempo updated to {new_tempo_bpm} BPM")
         
         # Update the analyzer grid with new tempo
         await self._update_analyzer_grid()
     
     async def _update_analyzer_grid(self):
         """Update the analyzer grid when tempo changes"""
-        # Find the analyzer for this session
-        session_id = None
-        for sid, metronome in metronomes_db.items():
-            if metronome == self:
-                session_id = sid
-                break
-        
-        if session_id and session_id in analyzers_db:
-            analyzer = analyzers_db[session_id]
+        analyzer = self.ctx.analyzer
+        if analyzer is not None:
             # Update analyzer with new tempo
             analyzer.update_tempo(self.effective_tempo)
             print(f"Analyzer updated for new tempo: {self.effective_tempo} BPM")
         
-    async def _run_metronome(self, websocket: WebSocket):
-        """Main metronome loop"""
-        tempo = self.effective_tempo
+    def _sync_position(self):
+        """Update the current beat and subdivision from the time since start"""
         subdivision = self.drill.subdivision
-        beats_per_bar = self.drill.beats_per_bar
+        elapsed = asyncio.get_running_loop().time() - self.start_time
+        total_subdivisions = int(elapsed / self.subdivision_interval)
+        self.current_subdivision = total_subdivisions % subdivision
+        self.current_beat = (total_subdivisions // subdivision) % self.drill.beats_per_bar
         
-        # Calculate intervals
-        beat_interval = 60.0 / tempo  # seconds per beat
-        subdivision_interval = beat_interval / subdivision  # seconds per subdivision
+    def _bar_ticks(self, subdivision_interval: float) -> List[MetronomeTick]:
+        """Build the ticks for one bar at the given subdivision interval"""
+        subdivision = self.drill.subdivision
+        return [
+            MetronomeTick(
+                beat=beat,
+                subdivision=sub,
+                is_downbeat=(beat == 0),
+                is_beat=(sub == 0),
+                t_offset_ms=(beat * subdivision + sub) * subdivision_interval * 1000.0
+            )
+            for beat in range(self.drill.beats_per_bar)
+            for sub in range(subdivision)
+        ]
         
+    async def _run_metronome(self, websocket: WebSocket):
+        """Metronome task: idle until started, then play bars until stopped"""
         try:
-            while self.is_playing:
-                # Calculate current position
-                elapsed = time.time() - self.start_time
-                total_subdivisions = int(elapsed / subdivision_interval)
-                
-                # Update beat and subdivision counters
-                self.current_subdivision = total_subdivisions % subdivision
-                self.current_beat = (total_subdivisions // subdivision) % beats_per_bar
-                
-                # Send tick information
-                tick = MetronomeTick(
-                    beat=self.current_beat,
-                    subdivision=self.current_subdivision,
-                    is_downbeat=(self.current_beat == 0),
-                    is_beat=(self.current_subdivision == 0)
-                )
-                
-                try:
-                    await websocket.send_json(tick.model_dump())
-                except:
-                    # WebSocket might be closed
-                    break
-                
-                # Wait for next subdivision
-                await asyncio.sleep(subdivision_interval)
-                
+            while not self._closed:
+                await self._wake.wait()
+                self._wake.clear()
+                if self.is_playing and not self._closed:
+                    await self._play_bars(websocket)
         except asyncio.CancelledError:
-            # Task was cancelled (normal when stopping)
+            # Task was cancelled (normal when closing)
             pass
         except Exception as e:
             print(f"Metronome error: {e}")
-        finally:
             self.is_playing = False
+        
+    async def _play_bars(self, websocket: WebSocket):
+        """Push one schedule of ticks per bar until woken by a stop or restart"""
+        subdivisions_per_bar = self.drill.subdivision * self.drill.beats_per_bar
+        tempo = None
+        started_at = self.start_time
+        
+        loop = asyncio.get_running_loop()
+        bar = 0
+        while True:
+            # A stop or restart that landed with the deadline must not get a stale bar
+            if not self.is_playing or self._wake.is_set():
+                return
+            
+            # Every bar has the same ticks at the same offsets until the tempo changes
+            if self.effective_tempo != tempo:
+                tempo = self.effective_tempo
+                bar_start = self.start_time + bar * subdivisions_per_bar * self.subdivision_interval
+                self.subdivision_interval = 60.0 / tempo / self.drill.subdivision
+                bar_interval = subdivisions_per_bar * self.subdivision_interval
+                # Rebase the start so `bar` bars have elapsed at the new tempo,
+                # which keeps the beat position continuous across the change
+                self.start_time = bar_start - bar * bar_interval
+                packed_ticks = protocol.pack_ticks(self._bar_ticks(self.subdivision_interval))
+            
+            t0_ms = (self.start_time + bar * bar_interval - started_at) * 1000.0
+            
+            try:
+                await websocket.send_bytes(
+                    protocol.pack_tick_schedule(t0_ms, subdivisions_per_bar, packed_ticks)
+                )
+            except Exception:
+                # WebSocket might be closed
+                self.is_playing = False
+                return
+            
+            # Wait for the next bar's absolute deadline so delays don't accumulate,
+            # returning early if stopped or restarted in the meantime
+            bar += 1
+            if self._wake.is_set():
+                return
+            try:
+                await asyncio.wait_for(
+                    self._wake.wait(),
+                    max(0.0, self.start_time + bar * bar_interval - loop.time())
+                )
+                return
+            except asyncio.TimeoutError:
+                pass
+
+async def cancel_and_wait(*tasks: asyncio.Task):
+    """Cancel tasks and wait until they have finished, so none outlive their owner"""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+async def send_message(websocket: WebSocket, message: Dict[str, Any]):
+    """Send a message as an orjson-encoded binary frame"""
+    await websocket.send_bytes(orjson.dumps(message))
+
+async def send_model(websocket: WebSocket, adapter: TypeAdapter, model: Any):
+    """Send a model as a binary frame, serialized directly by its adapter"""
+    await websocket.send_bytes(adapter.dump_json(model))
+
+async def receive_frame(websocket: WebSocket) -> Union[bytes, str]:
+    """Receive a frame's raw payload: bytes for binary frames, str for text frames"""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message["code"])
+    data = message.get("bytes")
+    return data if data is not None else message["text"]
+
+async def read_frames(websocket: WebSocket, inbox: asyncio.Queue):
+    """Move inbound frames onto the inbox, ending with whatever stopped the reader"""
+    while True:
+        try:
+            frame = await receive_frame(websocket)
+        except Exception as e:
+            await inbox.put(e)
+            return
+        await inbox.put(frame)
+
+async def flush_feedback(websocket: WebSocket, items: List[Dict[str, Any]]):
+    """Send and clear collected hit feedback: one hit as is, several as a feedback_batch"""
+    if len(items) == 1:
+        await send_message(websocket, items[0])
+    elif items:
+        await send_message(websocket, {"type": "feedback_batch", "items": items})
+    items.clear()
+
+# Prefer uvloop when the app is started without uvicorn's --loop option
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
 
 app = FastAPI(
     title="Drum Trainer API",
@@ -144,23 +273,56 @@ app = FastAPI(
     version="0.1.0"
 )
 
-# CORS middleware for development
+# CORS: the dev frontend and the production site. A fixed list lets Starlette
+# build the CORS headers once instead of echoing them per request.
+ALLOWED_ORIGINS = ["http://localhost:3000", "https://drumtrainer.app"]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Configure properly for production
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["content-type"],
 )
 
+async def evict_stale_sessions():
+    """Periodically drop expired sessions"""
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL_S)
+        sessions_db.expire()
+
+# Wall-clock time for the API's timestamps, refreshed in the background
+# rather than read per request; 100ms of staleness is fine for all of them
+CLOCK_REFRESH_INTERVAL_S = 0.1
+_now_utc = datetime.now(timezone.utc)
+_now_iso = _now_utc.isoformat()
+
+# Health body is static apart from the timestamp
+_HEALTH = {
+    "status": "healthy",
+    "timestamp": _now_iso,
+    "version": "0.1.0"
+}
+
+async def refresh_clock():
+    """Keep the cached wall-clock time current to within CLOCK_REFRESH_INTERVAL_S"""
+    global _now_utc, _now_iso
+    while True:
+        _now_utc = datetime.now(timezone.utc)
+        _now_iso = _now_utc.isoformat()
+        _HEALTH["timestamp"] = _now_iso
+        await asyncio.sleep(CLOCK_REFRESH_INTERVAL_S)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    """Start the stale session sweep and the clock refresh"""
+    app.state.session_sweeper = asyncio.create_task(evict_stale_sessions())
+    app.state.clock_refresher = asyncio.create_task(refresh_clock())
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for monitoring"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "version": "0.1.0"
-    }
+    return _HEALTH
 
 # Seed some default drills
 def seed_default_drills():
@@ -231,6 +393,43 @@ def seed_default_drills():
     drills_db[paradiddle.id] = paradiddle
     drills_db[singles.id] = singles
     drills_db[doubles.id] = doubles
+    cache_drill_json()
+
+def cache_drill_json():
+    """Re-encode every drill and the drill list from drills_db"""
+    global drill_list_json
+    drill_json_cache.clear()
+    session_start_prefix.clear()
+    drills = []
+    for drill_id, drill in drills_db.items():
+        payload = drill.model_dump(mode="json")
+        drill_json_cache[drill_id] = orjson.dumps(payload)
+        drills.append(payload)
+        # Strip the closing "}}" so session_start_frame can finish the drill object
+        session_start_prefix[drill_id] = orjson.dumps({
+            "type": "session_start",
+            "drill": {
+                "id": drill.id,
+                "name": drill.name,
+                "tempo_bpm": drill.tempo_bpm,
+                "subdivision": drill.subdivision,
+                "beats_per_bar": drill.beats_per_bar,
+                "bars": drill.bars
+            }
+        })[:-2]
+    drill_list_json = orjson.dumps({"drills": drills, "total": len(drills)})
+
+def session_start_frame(drill_id: str, session_id: str, custom_tempo_bpm: Optional[int],
+                        effective_tempo_bpm: int, server_start_time: str) -> bytes:
+    """Complete a drill's cached session_start prefix with the per-session fields"""
+    return b"".join((
+        session_start_prefix[drill_id],
+        b',"custom_tempo_bpm":', orjson.dumps(custom_tempo_bpm),
+        b',"effective_tempo_bpm":', orjson.dumps(effective_tempo_bpm),
+        b'},"session_id":', orjson.dumps(session_id),
+        b',"server_start_time":', orjson.dumps(server_start_time),
+        b'}',
+    ))
 
 # Seed drills on startup
 seed_default_drills()
@@ -242,17 +441,14 @@ async def root():
 @app.get("/v1/drills", response_model=DrillList)
 async def get_drills():
     """Get all available drills"""
-    return DrillList(
-        drills=list(drills_db.values()),
-        total=len(drills_db)
-    )
+    return Response(content=drill_list_json, media_type="application/json")
 
 @app.get("/v1/drills/{drill_id}", response_model=Drill)
 async def get_drill(drill_id: str):
     """Get a specific drill by ID"""
-    if drill_id not in drills_db:
+    if drill_id not in drill_json_cache:
         raise HTTPException(status_code=404, detail="Drill not found")
-    return drills_db[drill_id]
+    return Response(content=drill_json_cache[drill_id], media_type="application/json")
 
 @app.post("/v1/session", response_model=Session)
 async def create_session(session_data: SessionCreate):
@@ -261,76 +457,128 @@ async def create_session(session_data: SessionCreate):
         raise HTTPException(status_code=404, detail="Drill not found")
     
     # Create session with custom tempo if provided
-    session_id = str(uuid.uuid4())
+    session_id = secrets.token_hex(16)
     session = Session(
         id=session_id,
         drill_id=session_data.drill_id,
-        started_at=datetime.now(timezone.utc),
+        started_at=_now_utc,
         client_latency_ms=session_data.client_latency_ms,
         input_type=session_data.input_type,
         custom_tempo_bpm=session_data.custom_tempo_bpm
     )
     
-    # Store session
-    sessions_db[session_id] = session
-    
     # Create analyzer for this session
     drill = drills_db[session_data.drill_id]
     client_offset = session_data.client_latency_ms or 0.0
     analyzer = DrumAnalyzer(drill, client_offset)
-    analyzers_db[session_id] = analyzer
+    
+    # Store session
+    sessions_db[session_id] = SessionCtx(session, analyzer)
     
     return session
 
 @app.get("/v1/session/{session_id}", response_model=Session)
 async def get_session(session_id: str):
     """Get session information"""
-    if session_id not in sessions_db:
+    ctx = sessions_db.get(session_id)
+    if ctx is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    return sessions_db[session_id]
+    return ctx.session
+
+async def handle_audio(websocket: WebSocket, analyzer: DrumAnalyzer, metronome: Metronome, message: AudioHit):
+    """Run an audio frame through onset detection"""
+    # TODO: Implement audio processing
+    feedback = analyzer.process_audio_frame(message)
+    if feedback:
+        await send_model(websocket, HIT_FEEDBACK_ADAPTER, feedback)
+
+async def handle_metronome_control(websocket: WebSocket, analyzer: Optional[DrumAnalyzer], metronome: Metronome,
+                                   message: MetronomeCtl):
+    """Apply a metronome action and report the resulting state"""
+    if message.metronome_action == "start":
+        await metronome.start(websocket)
+    elif message.metronome_action == "stop":
+        await metronome.stop()
+    elif message.metronome_action == "reset":
+        await metronome.reset()
+    elif message.metronome_action == "update_tempo" and message.custom_tempo_bpm is not None:
+        await metronome.update_tempo(message.custom_tempo_bpm)
+    
+    # A running metronome's position is only stored on stop, so bring it up to date
+    if metronome.is_playing:
+        metronome._sync_position()
+    
+    # Send updated metronome state
+    metronome_state = MetronomeState(
+        is_playing=metronome.is_playing,
+        current_beat=metronome.current_beat,
+        current_subdivision=metronome.current_subdivision,
+        tempo_bpm=metronome.effective_tempo,  # Use effective tempo instead of drill tempo
+        subdivision=metronome.drill.subdivision,
+        beats_per_bar=metronome.drill.beats_per_bar
+    )
+    await send_model(websocket, METRONOME_STATE_ADAPTER, metronome_state)
+
+async def handle_calibration(websocket: WebSocket, analyzer: DrumAnalyzer, metronome: Metronome,
+                             message: Calibration):
+    """Apply a latency calibration"""
+    analyzer.update_client_offset(message.client_offset_ms)
+    await send_message(websocket, {
+        "type": "calibration_update",
+        "client_offset_ms": message.client_offset_ms
+    })
+
+# Handlers for every stream message except MIDI hits, whose feedback is batched
+# inline; keyed by the struct class the decoder returns
+STREAM_HANDLERS = {
+    AudioHit: handle_audio,
+    MetronomeCtl: handle_metronome_control,
+    Calibration: handle_calibration,
+}
 
 @app.websocket("/v1/stream/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
-    """WebSocket endpoint for real-time drum analysis"""
+    """WebSocket endpoint for real-time drum analysis
+    
+    Hits that arrive while earlier ones are still being handled are answered
+    together in one feedback_batch frame; a lone hit gets its own hit_feedback.
+    """
     await websocket.accept()
     
     # Validate session
-    if session_id not in sessions_db:
+    ctx = sessions_db.get(session_id)
+    if ctx is None:
         await websocket.close(code=4004, reason="Session not found")
         return
     
-    if session_id not in analyzers_db:
+    if ctx.analyzer is None:
         await websocket.close(code=4004, reason="Analyzer not found")
         return
     
-    session = sessions_db[session_id]
-    analyzer = analyzers_db[session_id]
+    session = ctx.session
     drill = drills_db[session.drill_id]
     
     # Start the analyzer session for proper timing calculations
-    analyzer.start_session()
+    ctx.analyzer.start_session()
     
     # Create metronome for this session
-    metronome = Metronome(drill, session.custom_tempo_bpm)
-    metronomes_db[session_id] = metronome
+    metronome = Metronome(ctx, drill, session.custom_tempo_bpm)
+    ctx.metronome = metronome
+    
+    # Frames are read by their own task so the loop can see what has queued up
+    inbox = asyncio.Queue(maxsize=INBOX_MAX)
+    reader = asyncio.create_task(read_frames(websocket, inbox))
+    feedback: List[Dict[str, Any]] = []
     
     try:
         # Send session start info
-        await websocket.send_json({
-            "type": "session_start",
-            "session_id": session_id,
-            "drill": {
-                "id": drill.id,
-                "name": drill.name,
-                "tempo_bpm": drill.tempo_bpm,
-                "custom_tempo_bpm": session.custom_tempo_bpm,
-                "effective_tempo_bpm": metronome.effective_tempo,
-                "subdivision": drill.subdivision,
-                "beats_per_bar": drill.beats_per_bar,
-                "bars": drill.bars
-            },
-            "server_start_time": datetime.now(timezone.utc).isoformat()
-        })
+        await websocket.send_bytes(session_start_frame(
+            drill.id,
+            session_id,
+            session.custom_tempo_bpm,
+            metronome.effective_tempo,
+            _now_iso
+        ))
         
         # Send initial metronome state
         metronome_state = MetronomeState(
@@ -341,79 +589,63 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             subdivision=drill.subdivision,
             beats_per_bar=drill.beats_per_bar
         )
-        await websocket.send_json(metronome_state.model_dump())
+        await send_model(websocket, METRONOME_STATE_ADAPTER, metronome_state)
         
         # Main message loop
         while True:
-            try:
-                # Receive message
-                data = await websocket.receive_text()
-                message = json.loads(data)
+            # Drain everything that has already arrived
+            frames = [await inbox.get()]
+            while len(frames) < FEEDBACK_BATCH_MAX and not inbox.empty():
+                frames.append(inbox.get_nowait())
+            
+            for data in frames:
+                if isinstance(data, Exception):
+                    raise data
                 
-                # Validate message
                 try:
-                    hit_event = HitEvent(**message)
-                except ValidationError as e:
-                    await websocket.send_json({
+                    message = STREAM_DECODER.decode(data)
+                except msgspec.ValidationError as e:
+                    await flush_feedback(websocket, feedback)
+                    await send_message(websocket, {
                         "type": "error",
                         "message": f"Invalid message format: {str(e)}"
                     })
                     continue
+                except msgspec.DecodeError:
+                    await flush_feedback(websocket, feedback)
+                    await send_message(websocket, {
+                        "type": "error",
+                        "message": "Invalid JSON"
+                    })
+                    continue
+                
+                # Finalizing detaches the analyzer; from then on nothing is scored
+                analyzer = ctx.analyzer
+                if analyzer is None and not isinstance(message, MetronomeCtl):
+                    await flush_feedback(websocket, feedback)
+                    await send_message(websocket, {
+                        "type": "error",
+                        "message": "Take already finalized"
+                    })
+                    continue
                 
-                # Process based on type
-                if hit_event.type == "midi":
+                if isinstance(message, MidiHit):
                     try:
-                        feedback = analyzer.process_midi_hit(hit_event)
-                        await websocket.send_json(feedback.model_dump())
+                        feedback.append(analyzer.process_midi_hit_fast(message.t, message.velocity))
                     except Exception as e:
-                        await websocket.send_json({
+                        await flush_feedback(websocket, feedback)
+                        await send_message(websocket, {
                             "type": "error",
                             "message": f"Error processing MIDI hit: {str(e)}"
                         })
+                    continue
                 
-                elif hit_event.type == "audio":
-                    # TODO: Implement audio processing
-                    feedback = analyzer.process_audio_frame(hit_event)
-                    if feedback:
-                        await websocket.send_json(feedback.model_dump())
-                
-                elif hit_event.type == "metronome_control":
-                    # Handle metronome control
-                    if hit_event.metronome_action == "start":
-                        await metronome.start(websocket)
-                    elif hit_event.metronome_action == "stop":
-                        await metronome.stop()
-                    elif hit_event.metronome_action == "reset":
-                        await metronome.reset()
-                    elif hit_event.metronome_action == "update_tempo" and hit_event.custom_tempo_bpm is not None:
-                        await metronome.update_tempo(hit_event.custom_tempo_bpm)
-                    
-                    # Send updated metronome state
-                    metronome_state = MetronomeState(
-                        is_playing=metronome.is_playing,
-                        current_beat=metronome.current_beat,
-                        current_subdivision=metronome.current_subdivision,
-                        tempo_bpm=metronome.effective_tempo,  # Use effective tempo instead of drill tempo
-                        subdivision=drill.subdivision,
-                        beats_per_bar=drill.beats_per_bar
-                    )
-                    await websocket.send_json(metronome_state.model_dump())
-                
-                elif hit_event.type == "calibration":
-                    # Handle latency calibration
-                    if "client_offset_ms" in message:
-                        new_offset = message["client_offset_ms"]
-                        analyzer.update_client_offset(new_offset)
-                        await websocket.send_json({
-                            "type": "calibration_update",
-                            "client_offset_ms": new_offset
-                        })
+                # Anything else is answered in order, after the feedback before it
+                await flush_feedback(websocket, feedback)
                 
-            except json.JSONDecodeError:
-                await websocket.send_json({
-                    "type": "error",
-                    "message": "Invalid JSON"
-                })
+                await STREAM_HANDLERS[type(message)](websocket, analyzer, metronome, message)
+            
+            await flush_feedback(websocket, feedback)
                 
     except WebSocketDisconnect:
         print(f"WebSocket disconnected for session {session_id}")
@@ -424,48 +656,50 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
         except:
             pass
     finally:
-        # Clean up metronome
-        if session_id in metronomes_db:
-            await metronomes_db[session_id].stop()
-            del metronomes_db[session_id]
+        # Nothing started for this stream may outlive it
+        await cancel_and_wait(reader)
+        
+        # Clean up metronome, unless a newer connection has replaced it
+        await metronome.close()
+        if ctx.metronome is metronome:
+            # Renew while still kept, so the idle clock restarts from the end
+            # of the stream and the take can still be finalized
+            sessions_db.get(session_id)
+            ctx.metronome = None
 
 @app.post("/v1/take/{session_id}/finalize")
 async def finalize_take(session_id: str):
     """Finalize a session and get final metrics"""
-    if session_id not in sessions_db:
+    ctx = sessions_db.get(session_id)
+    if ctx is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    if session_id not in analyzers_db:
+    if ctx.analyzer is None:
         raise HTTPException(status_code=404, detail="Analyzer not found")
     
-    # Get final metrics
-    analyzer = analyzers_db[session_id]
-    metrics = analyzer.get_final_metrics()
+    # Detach the analyzer first, so a still-connected stream stops writing to it
+    # while the metrics are computed
+    analyzer = ctx.analyzer
+    ctx.analyzer = None
     
     # Update session status
-    sessions_db[session_id].status = "completed"
+    ctx.session.status = "completed"
     
-    # Clean up analyzer
-    del analyzers_db[session_id]
+    # Get final metrics off the event loop so other sessions' metronomes keep time
+    metrics = await run_in_threadpool(analyzer.get_final_metrics)
     
     return {
         "session_id": session_id,
         "metrics": metrics.model_dump(),
-        "finished_at": datetime.now(timezone.utc).isoformat()
+        "finished_at": _now_iso
     }
 
 @app.delete("/v1/session/{session_id}")
 async def clear_session(session_id: str):
     """Clear a session and clean up resources"""
-    if session_id in sessions_db:
-        del sessions_db[session_id]
-    
-    if session_id in analyzers_db:
-        del analyzers_db[session_id]
-    
-    if session_id in metronomes_db:
-        await metronomes_db[session_id].stop()
-        del metronomes_db[session_id]
+    ctx = sessions_db.pop(session_id, None)
+    if ctx is not None and ctx.metronome is not None:
+        await ctx.metronome.stop()
     
     return {"message": "Session cleared"}
 
@@ -478,13 +712,11 @@ async def update_drill_tempo(drill_id: str, tempo_update: DrillTempoUpdate):
     drill = drills_db[drill_id]
     
     # Create updated drill with new tempo
-    updated_drill = Drill(
-        **drill.model_dump(),
-        tempo_bpm=tempo_update.new_tempo_bpm
-    )
+    updated_drill = drill.model_copy(update={"tempo_bpm": tempo_update.new_tempo_bpm})
     
     # Update the drill in the database
     drills_db[drill_id] = updated_drill
+    cache_drill_json()
     
     return {
         "message": f"Drill tempo updated to {tempo_update.new_tempo_bpm} BPM",
@@ -492,5 +724,23 @@ async def update_drill_tempo(drill_id: str, tempo_update: DrillTempoUpdate):
     }
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop has no Windows build; httptools does
+    loop = "asyncio" if sys.platform == "win32" else "uvloop"
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop=loop,
+        http="httptools",
+        # Stream frames are a few hundred bytes at most; deflating them
+        # costs more CPU than it saves on the wire
+        ws="websockets",
+        ws_per_message_deflate=False,
+        # Skip per-request logging, proxy header rewriting and default headers
+        access_log=False,
+        proxy_headers=False,
+        server_header=False,
+        date_header=False,
+    )
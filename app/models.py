@@ -1,7 +1,8 @@
+import msgspec
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Literal
+from typing import List, Dict, Optional, Literal, Union
+from typing_extensions import Annotated
 from datetime import datetime
-import json
 
 class VelocityTargets(BaseModel):
     accent: int = Field(..., ge=0, le=127)
@@ -26,18 +27,13 @@ class Drill(BaseModel):
     subdivision: int = Field(..., ge=1, le=16)
     beats_per_bar: int = Field(..., ge=1, le=16)
     bars: int = Field(..., ge=1, le=32)
-    stickings: List[str] = Field(..., min_items=1)
-    accents: List[int] = Field(..., min_items=1)
+    stickings: List[str] = Field(..., min_length=1)
+    accents: List[int] = Field(..., min_length=1)
     velocity_targets: VelocityTargets
     timing: TimingConfig
     created_by: Optional[str] = None
     created_at: Optional[datetime] = None
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
-
 class SessionCreate(BaseModel):
     drill_id: str
     input_type: Literal["midi", "audio"]
@@ -58,7 +54,7 @@ class HitEvent(BaseModel):
     t: float  # client monotonic time in ms
     type: Literal["midi", "audio", "metronome_control"]
     note: Optional[int] = None  # for MIDI
-    velocity: Optional[int] = None  # for MIDI
+    velocity: Optional[int] = Field(None, ge=0, le=127)  # for MIDI
     seq: Optional[int] = None  # for audio
     pcm: Optional[str] = None  # base64 encoded PCM for audio
     metronome_action: Optional[Literal["start", "stop", "reset", "update_tempo"]] = None  # for metronome control
@@ -116,7 +112,31 @@ class MetronomeTick(BaseModel):
     subdivision: int
     is_downbeat: bool
     is_beat: bool
+    t_offset_ms: float = 0.0  # offset from the start of the bar when scheduled
 
 class DrillTempoUpdate(BaseModel):
     drill_id: str
-    new_tempo_bpm: int = Field(..., ge=40, le=300)
\ No newline at end of file
+    new_tempo_bpm: int = Field(..., ge=40, le=300)
+
+# Inbound stream messages, decoded straight from JSON with msgspec.
+# The "type" field picks the struct, so no dispatch on it is needed.
+class MidiHit(msgspec.Struct, tag_field="type", tag="midi"):
+    t: float  # client monotonic time in ms
+    velocity: Annotated[int, msgspec.Meta(ge=0, le=127)]  # MIDI velocity range
+    note: Optional[int] = None
+
+class AudioHit(msgspec.Struct, tag_field="type", tag="audio"):
+    t: float
+    seq: Optional[int] = None
+    pcm: Optional[str] = None  # base64 encoded PCM
+
+class MetronomeCtl(msgspec.Struct, tag_field="type", tag="metronome_control"):
+    t: float
+    metronome_action: Optional[Literal["start", "stop", "reset", "update_tempo"]] = None
+    custom_tempo_bpm: Optional[Annotated[int, msgspec.Meta(ge=40, le=300)]] = None
+
+class Calibration(msgspec.Struct, tag_field="type", tag="calibration"):
+    client_offset_ms: float
+    t: Optional[float] = None
+
+StreamMessage = Union[MidiHit, AudioHit, MetronomeCtl, Calibration]
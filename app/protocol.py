@@ -0,0 +1,40 @@
+"""
+Binary framing for the metronome's per-bar tick schedules
+
+All other server messages are JSON objects, so their frames start with "{".
+A schedule frame starts with TICK_SCHEDULE_TAG instead, which the client
+checks before falling back to JSON.
+"""
+
+import struct
+from typing import List
+
+from .models import MetronomeTick
+
+TICK_SCHEDULE_TAG = 0x01
+
+# tag, tick count, bar start in ms since the metronome started
+SCHEDULE_HEADER = struct.Struct("<BHd")
+# beat, subdivision, flags, offset from the bar start in ms
+TICK = struct.Struct("<BBBf")
+
+FLAG_BEAT = 0x01
+FLAG_DOWNBEAT = 0x02
+
+
+def pack_ticks(ticks: List[MetronomeTick]) -> bytes:
+    """Pack a bar's ticks into the body of a schedule frame"""
+    return b"".join(
+        TICK.pack(
+            tick.beat,
+            tick.subdivision,
+            (FLAG_DOWNBEAT if tick.is_downbeat else 0) | (FLAG_BEAT if tick.is_beat else 0),
+            tick.t_offset_ms,
+        )
+        for tick in ticks
+    )
+
+
+def pack_tick_schedule(t0_ms: float, tick_count: int, packed_ticks: bytes) -> bytes:
+    """Prefix packed ticks with the schedule header for one bar"""
+    return SCHEDULE_HEADER.pack(TICK_SCHEDULE_TAG, tick_count, t0_ms) + packed_ticks
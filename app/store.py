@@ -0,0 +1,82 @@
+"""
+Bounded in-memory stores for per-session state
+"""
+
+import time
+from collections import OrderedDict
+from typing import Callable, Iterator, List, MutableMapping, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLStore(MutableMapping[str, V]):
+    """Dict-like store that drops entries idle for longer than `ttl` seconds
+    and evicts the least recently used entry once `maxsize` is reached.
+
+    Reads and writes both count as use. Iterating does not, so a sweep over
+    the store never keeps its entries alive. Entries for which `keep` returns
+    true are never dropped; they are renewed instead.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600.0,
+                 keep: Optional[Callable[[V], bool]] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.keep = keep
+        self._data: "OrderedDict[str, Tuple[float, V]]" = OrderedDict()
+
+    def _kept(self, value: V) -> bool:
+        return self.keep is not None and self.keep(value)
+
+    def _renew(self, key: str, value: V):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+
+    def __getitem__(self, key: str) -> V:
+        expires_at, value = self._data[key]
+        now = time.monotonic()
+        if expires_at <= now and not self._kept(value):
+            del self._data[key]
+            raise KeyError(key)
+        self._data[key] = (now + self.ttl, value)
+        self._data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: str, value: V):
+        self._renew(key, value)
+        # Evict least recently used first, passing over (and renewing) kept entries
+        for _ in range(len(self._data)):
+            if len(self._data) <= self.maxsize:
+                break
+            oldest, (_, oldest_value) = next(iter(self._data.items()))
+            if self._kept(oldest_value):
+                self._renew(oldest, oldest_value)
+            else:
+                del self._data[oldest]
+
+    def __delitem__(self, key: str):
+        del self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def expire(self) -> List[str]:
+        """Remove expired entries and return their keys"""
+        now = time.monotonic()
+        expired = []
+        # Entries are ordered by last use, so stop at the first live one
+        for key, (expires_at, value) in self._data.items():
+            if expires_at > now:
+                break
+            expired.append((key, value))
+        removed = []
+        for key, value in expired:
+            if self._kept(value):
+                self._renew(key, value)
+            else:
+                del self._data[key]
+                removed.append(key)
+        return removed
@@ -1,6 +1,7 @@
 import React, { useEffect, useState, useRef } from 'react';
 import { useDrumTrainerStore } from './store';
-import { Drill } from './types';
+import { parseServerMessage, sendClientMessage } from './protocol';
+import { Drill, MetronomeTick } from './types';
 import GradientText from './components/GradientText';
 import './App.css';
 
@@ -41,6 +42,10 @@ function App() {
   const [customTempoBpm, setCustomTempoBpm] = useState<number | null>(null);
   const [showTempoCustomization, setShowTempoCustomization] = useState(false);
   
+  // Scheduled metronome clicks: one shared audio context plus pending beat-display timers
+  const clickContextRef = useRef<AudioContext | null>(null);
+  const pendingTicksRef = useRef<number[]>([]);
+  
   // Refs to prevent duplicate effect runs
   const drillsFetchedRef = useRef(false);
   const midiSetupRef = useRef(false);
@@ -114,7 +119,7 @@ function App() {
                 if (isConnected && currentSession) {
                   const ws = useDrumTrainerStore.getState().ws;
                   if (ws && ws.readyState === WebSocket.OPEN) {
-                    ws.send(JSON.stringify(hitEvent));
+                    sendClientMessage(ws, hitEvent);
                   }
                 }
               }
@@ -154,18 +159,25 @@ function App() {
     
     const handleMessage = (event: MessageEvent) => {
       try {
-        const message = JSON.parse(event.data);
+        const message: any = parseServerMessage(event.data);
         
         if (message.type === 'metronome_state') {
+          if (!message.is_playing) {
+            cancelScheduledTicks();
+          }
           setIsMetronomePlaying(message.is_playing);
           setCurrentBeat(message.current_beat);
           setCurrentSubdivision(message.current_subdivision);
-        } else if (message.type === 'metronome_tick') {
-          setCurrentBeat(message.beat);
-          setCurrentSubdivision(message.subdivision);
-          
-          // Play click sound for immediate audio feedback
-          playClickSound(message.is_downbeat, message.is_beat);
+        } else if (message.type === 'tick_schedule') {
+          // One frame per bar: queue every click on the audio clock and the
+          // beat display on timers, both relative to the frame's arrival
+          pendingTicksRef.current = message.ticks.map((tick: MetronomeTick) => {
+            playClickSound(tick.is_downbeat, tick.is_beat, tick.t_offset_ms / 1000);
+            return window.setTimeout(() => {
+              setCurrentBeat(tick.beat);
+              setCurrentSubdivision(tick.subdivision);
+            }, tick.t_offset_ms);
+          });
         }
       } catch (error) {
         console.error('Error parsing WebSocket message:', error);
@@ -176,13 +188,28 @@ function App() {
     
     return () => {
       ws.removeEventListener('message', handleMessage);
+      cancelScheduledTicks();
     };
   }, [isConnected, currentSession]);
 
-  // Simple click sound generation
-  const playClickSound = (isDownbeat: boolean, isBeat: boolean) => {
+  // Drop clicks and beat updates scheduled for the rest of the bar
+  const cancelScheduledTicks = () => {
+    pendingTicksRef.current.forEach((id) => window.clearTimeout(id));
+    pendingTicksRef.current = [];
+    if (clickContextRef.current) {
+      clickContextRef.current.close();
+      clickContextRef.current = null;
+    }
+  };
+
+  // Simple click sound generation, optionally scheduled ahead on the audio clock
+  const playClickSound = (isDownbeat: boolean, isBeat: boolean, delaySeconds: number = 0) => {
     try {
-      const audioContext = new (window.AudioContext || (window as any).webkitAudioContext)();
+      if (!clickContextRef.current) {
+        clickContextRef.current = new (window.AudioContext || (window as any).webkitAudioContext)();
+      }
+      const audioContext = clickContextRef.current;
+      const startTime = audioContext.currentTime + delaySeconds;
       const oscillator = audioContext.createOscillator();
       const gainNode = audioContext.createGain();
       
@@ -191,21 +218,21 @@ function App() {
       
       // Different frequencies for different beat types
       if (isDownbeat) {
-        oscillator.frequency.setValueAtTime(800, audioContext.currentTime); // Higher pitch for downbeat
-        gainNode.gain.setValueAtTime(0.3, audioContext.currentTime);
+        oscillator.frequency.setValueAtTime(800, startTime); // Higher pitch for downbeat
+        gainNode.gain.setValueAtTime(0.3, startTime);
       } else if (isBeat) {
-        oscillator.frequency.setValueAtTime(600, audioContext.currentTime); // Medium pitch for beat
-        gainNode.gain.setValueAtTime(0.2, audioContext.currentTime);
+        oscillator.frequency.setValueAtTime(600, startTime); // Medium pitch for beat
+        gainNode.gain.setValueAtTime(0.2, startTime);
       } else {
-        oscillator.frequency.setValueAtTime(400, audioContext.currentTime); // Lower pitch for subdivision
-        gainNode.gain.setValueAtTime(0.1, audioContext.currentTime);
+        oscillator.frequency.setValueAtTime(400, startTime); // Lower pitch for subdivision
+        gainNode.gain.setValueAtTime(0.1, startTime);
       }
       
       // Envelope for click sound
-      gainNode.gain.exponentialRampToValueAtTime(0.01, audioContext.currentTime + 0.1);
+      gainNode.gain.exponentialRampToValueAtTime(0.01, startTime + 0.1);
       
-      oscillator.start(audioContext.currentTime);
-      oscillator.stop(audioContext.currentTime + 0.1);
+      oscillator.start(startTime);
+      oscillator.stop(startTime + 0.1);
     } catch (error) {
       console.log('Audio context not available:', error);
     }
@@ -293,7 +320,7 @@ function App() {
               type: 'metronome_control' as const,
               metronome_action: 'start' as const
             };
-            ws.send(JSON.stringify(metronomeMessage));
+            sendClientMessage(ws, metronomeMessage);
           }
           return 4; // Reset for next time
         }
@@ -322,7 +349,7 @@ function App() {
         type: 'metronome_control' as const,
         metronome_action: 'stop' as const
       };
-      ws.send(JSON.stringify(metronomeMessage));
+      sendClientMessage(ws, metronomeMessage);
     }
   };
 
@@ -343,7 +370,7 @@ function App() {
         type: 'metronome_control' as const,
         metronome_action: 'reset' as const
       };
-      ws.send(JSON.stringify(metronomeMessage));
+      sendClientMessage(ws, metronomeMessage);
     }
   };
 
@@ -359,7 +386,7 @@ function App() {
         metronome_action: 'update_tempo' as const,
         custom_tempo_bpm: customTempoBpm
       };
-      ws.send(JSON.stringify(metronomeMessage));
+      sendClientMessage(ws, metronomeMessage);
       
       // Close the tempo customization panel
       setShowTempoCustomization(false);
@@ -388,7 +415,7 @@ function App() {
     // Send to WebSocket if connected
     const ws = useDrumTrainerStore.getState().ws;
     if (ws && ws.readyState === WebSocket.OPEN) {
-      ws.send(JSON.stringify(hitEvent));
+      sendClientMessage(ws, hitEvent);
       console.log(`🎵 Keyboard MIDI: ${keyInfo.name} (Note ${keyInfo.note})`);
     }
   };
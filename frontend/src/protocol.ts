@@ -0,0 +1,46 @@
+import { MetronomeTick, TickSchedule, WebSocketMessage } from './types';
+
+const decoder = new TextDecoder();
+const encoder = new TextEncoder();
+
+// Tick schedules arrive packed (see app/protocol.py); every other frame is a
+// JSON object and so starts with "{", never with this tag
+const TICK_SCHEDULE_TAG = 0x01;
+const SCHEDULE_HEADER_SIZE = 11;  // tag u8, tick count u16, t0_ms f64
+const TICK_SIZE = 7;              // beat u8, subdivision u8, flags u8, t_offset_ms f32
+const FLAG_BEAT = 0x01;
+const FLAG_DOWNBEAT = 0x02;
+
+function parseTickSchedule(view: DataView): TickSchedule {
+  const count = view.getUint16(1, true);
+  const ticks: MetronomeTick[] = [];
+  for (let i = 0, offset = SCHEDULE_HEADER_SIZE; i < count; i++, offset += TICK_SIZE) {
+    const flags = view.getUint8(offset + 2);
+    ticks.push({
+      type: 'metronome_tick',
+      beat: view.getUint8(offset),
+      subdivision: view.getUint8(offset + 1),
+      is_downbeat: (flags & FLAG_DOWNBEAT) !== 0,
+      is_beat: (flags & FLAG_BEAT) !== 0,
+      t_offset_ms: view.getFloat32(offset + 3, true),
+    });
+  }
+  return { type: 'tick_schedule', t0_ms: view.getFloat64(3, true), ticks };
+}
+
+// Server messages arrive as binary frames of UTF-8 JSON; text frames are still accepted
+export function parseServerMessage(data: string | ArrayBuffer): WebSocketMessage {
+  if (typeof data === 'string') {
+    return JSON.parse(data);
+  }
+  const view = new DataView(data);
+  if (view.byteLength > 0 && view.getUint8(0) === TICK_SCHEDULE_TAG) {
+    return parseTickSchedule(view);
+  }
+  return JSON.parse(decoder.decode(data));
+}
+
+// Client messages go out as binary frames so the server can decode the bytes as they arrive
+export function sendClientMessage(ws: WebSocket, message: object): void {
+  ws.send(encoder.encode(JSON.stringify(message)));
+}
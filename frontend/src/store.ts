@@ -1,5 +1,6 @@
 import { create } from 'zustand';
-import { Drill, Session, HitFeedback, WebSocketMessage } from './types';
+import { Drill, Session, HitFeedback } from './types';
+import { parseServerMessage } from './protocol';
 
 interface DrumTrainerState {
   // Drills
@@ -94,6 +95,7 @@ export const useDrumTrainerStore = create<DrumTrainerState>((set, get) => ({
     disconnectWebSocket();
     
     const ws = new WebSocket(`ws://localhost:8000/v1/stream/${sessionId}`);
+    ws.binaryType = 'arraybuffer';
     
     ws.onopen = () => {
       set({ ws, isConnected: true });
@@ -102,11 +104,13 @@ export const useDrumTrainerStore = create<DrumTrainerState>((set, get) => ({
     
     ws.onmessage = (event) => {
       try {
-        const message: WebSocketMessage = JSON.parse(event.data);
+        const message = parseServerMessage(event.data);
         const { addHitFeedback } = get();
         
         if (message.type === 'hit_feedback') {
           addHitFeedback(message);
+        } else if (message.type === 'feedback_batch') {
+          message.items.forEach(addHitFeedback);
         } else if (message.type === 'session_start') {
           console.log('Session started:', message);
         } else if (message.type === 'calibration_update') {
@@ -73,6 +73,11 @@ export interface HitFeedback {
   };
 }
 
+export interface FeedbackBatch {
+  type: 'feedback_batch';
+  items: HitFeedback[];
+}
+
 export interface SessionStart {
   type: 'session_start';
   session_id: string;
@@ -87,6 +92,21 @@ export interface SessionStart {
   server_start_time: string;
 }
 
+export interface MetronomeTick {
+  type: 'metronome_tick';
+  beat: number;
+  subdivision: number;
+  is_downbeat: boolean;
+  is_beat: boolean;
+  t_offset_ms: number;
+}
+
+export interface TickSchedule {
+  type: 'tick_schedule';
+  t0_ms: number;
+  ticks: MetronomeTick[];
+}
+
 export interface CalibrationUpdate {
   type: 'calibration_update';
   client_offset_ms: number;
@@ -97,4 +117,4 @@ export interface ErrorMessage {
   message: string;
 }
 
-export type WebSocketMessage = HitFeedback | SessionStart | CalibrationUpdate | ErrorMessage;
+export type WebSocketMessage = HitFeedback | FeedbackBatch | SessionStart | TickSchedule | CalibrationUpdate | ErrorMessage;
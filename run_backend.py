@@ -3,7 +3,8 @@
 Simple script to run the backend server
 """
 
-import uvicorn
+import runpy
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    # Same server settings as `python -m app`, kept in one place
+    runpy.run_module("app", run_name="__main__", alter_sys=True)
@@ -4,26 +4,85 @@ Development startup script for Drum Trainer
 Starts both the backend and frontend servers
 """
 
+import atexit
+import hashlib
+import io
+import json
+import select
+import shutil
+import signal
 import subprocess
 import sys
+import threading
 import time
 import os
 import requests
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from importlib.util import find_spec
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+
+BACKEND_URL = "http://localhost:8000/health"
+FRONTEND_URL = "http://localhost:3000"
+
+_IS_WIN = os.name == "nt"
+_VENV = Path("venv")
+_FRONTEND = Path("frontend")
+_VENV_PY = _VENV / ("Scripts/python.exe" if _IS_WIN else "bin/python")
+
+# One pooled session for readiness polling, so retries reuse their connection
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+atexit.register(_session.close)
+
+# Set on shutdown so readiness pollers return instead of waiting out their timeout
+_stop_polling = threading.Event()
+
+# Result of the last successful node/npm probe, keyed on the toolchain it saw
+TOOLCHAIN_CACHE = Path(".start_dev_cache.json")
+
+def _toolchain_key():
+    """Fingerprint of the node/npm install: platform, PATH and the binaries' mtimes"""
+    parts = [sys.platform, hashlib.sha1(os.environ.get("PATH", "").encode()).hexdigest()]
+    for path in (shutil.which("node"), _npm_path()):
+        parts.append(str(os.stat(path).st_mtime_ns) if path else "")
+    return "|".join(parts)
+
+def _toolchain_cached(key):
+    """Whether node and npm were already found with this exact toolchain"""
+    try:
+        cache = json.loads(TOOLCHAIN_CACHE.read_text())
+    except (OSError, ValueError):
+        return False
+    return cache.get("key") == key and cache.get("node_ok") and cache.get("npm_ok")
+
+def _write_toolchain_cache(key):
+    """Remember that node and npm were found with this toolchain"""
+    try:
+        TOOLCHAIN_CACHE.write_text(json.dumps({"key": key, "node_ok": True, "npm_ok": True}))
+    except OSError:
+        pass
+
+@lru_cache(maxsize=1)
+def _npm_path():
+    """Full path to npm (npm.cmd on Windows), looked up on PATH without a shell"""
+    return shutil.which("npm.cmd") if _IS_WIN else shutil.which("npm")
+
+@lru_cache(maxsize=1)
+def _have_backend_deps():
+    """Whether fastapi and uvicorn are importable, found without importing them"""
+    return find_spec("fastapi") is not None and find_spec("uvicorn") is not None
 
 def check_dependencies(): 
-    """Check if required dependencies are installed"""
+    """Check if the backend's Python dependencies are installed"""
     # Check if we're in a virtual environment or if dependencies are available
-    try:
-        import fastapi
-        import uvicorn  
+    if _have_backend_deps():
         print("✓ Python dependencies found")
-        return True
-    except ImportError:
+    else:
         # Try to activate virtual environment if it exists
-        venv_path = Path("venv")
-        if venv_path.exists():
+        if _VENV.exists():
             print("⚠️  Dependencies not found in current environment")
             print("   Found virtual environment at 'venv/'")
             print("   Please activate it first: source venv/bin/activate")
@@ -31,6 +90,15 @@ def check_dependencies():
         else:
             print("✗ Python dependencies not found. Please run: pip install -r requirements.txt")
         return False
+    return True
+
+def check_node_toolchain():
+    """Check that Node.js and npm are available for the frontend"""
+    # The node/npm probes only need to run again when the toolchain changes
+    toolchain_key = _toolchain_key()
+    if _toolchain_cached(toolchain_key):
+        print("✓ Node.js and npm found (cached)")
+        return True
     
     # Check if Node.js is available
     try:
@@ -41,106 +109,105 @@ def check_dependencies():
         return False
     
     # Check if npm is available (Windows-friendly)
-    npm_found = False
-    npm_commands = ["npm", "npm.cmd"]
-    
-    for npm_cmd in npm_commands:
-        try:
-            #  Use shell  = True on Windows for better PATH resolution
-            if os.name   == 'nt':  # Windows
-               result     = subprocess.run(f"{npm_cmd} --version", shell=True, check=True, capture_output=True, text=True)
-            else:
-                result = subprocess.run([npm_cmd, "--version"], check=True, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                print(f"✓ npm found (version: {result.stdout.strip()})")
-                npm_found = True
-                break
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            continue
+    npm_path = _npm_path()
+    if npm_path is None:
+        print("✗ npm not found. Please install npm")
+        return False
     
-    if not npm_found:
+    try:
+        result = subprocess.run([npm_path, "--version"], check=True, capture_output=True, text=True)
+        print(f"✓ npm found (version: {result.stdout.strip()})")
+    except subprocess.CalledProcessError:
         print("✗ npm not found. Please install npm")
         return False
     
+    _write_toolchain_cache(toolchain_key)
     return True
 
-def install_frontend_deps():
+def _run_captured(command, out, **kwargs):
+    """Run a command, writing its combined output to `out` once it finishes"""
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, **kwargs)
+    out.write(result.stdout)
+    result.check_returncode()
+
+def _buffered(install):
+    """Run an install step with its output collected; returns (ok, output)"""
+    out = io.StringIO()
+    ok = install(out)
+    return ok, out.getvalue()
+
+def install_frontend_deps(out=None):
     """Install frontend dependencies if needed"""
-    frontend_dir = Path("frontend")
-    if not frontend_dir.exists():
-        print("✗ Frontend directory not found")
+    out = out or sys.stdout
+    if not _FRONTEND.exists():
+        print("✗ Frontend directory not found", file=out)
         return False
     
-    node_modules = frontend_dir / "node_modules"
+    node_modules = _FRONTEND / "node_modules"
     if not node_modules.exists():
-        print("Installing frontend dependencies...")
+        print("Installing frontend dependencies...", file=out)
+        npm_path = _npm_path()
+        if npm_path is None:
+            print("✗ npm not found. Please install npm", file=out)
+            return False
         try:
-            # Use shell=True on Windows for better PATH resolution
-            if os.name == 'nt':  # Windows
-                subprocess.run("npm install", cwd=frontend_dir, shell=True, check=True)
-            else:
-                subprocess.run(["npm", "install"], cwd=frontend_dir, check=True)
-            print("✓ Frontend dependencies installed")
+            _run_captured([npm_path, "install"], out, cwd=_FRONTEND)
+            print("✓ Frontend dependencies installed", file=out)
         except subprocess.CalledProcessError:
-            print("✗ Failed to install frontend dependencies")
+            print("✗ Failed to install frontend dependencies", file=out)
             return False
     else:
-        print("✓ Frontend dependencies already installed")
+        print("✓ Frontend dependencies already installed", file=out)
     
     return True
 
-def install_backend_deps():
+def install_backend_deps(out=None):
     """Install backend dependencies if needed"""
-    venv_path = Path("venv")
-    if not venv_path.exists():
-        print("✗ Virtual environment not found")
+    out = out or sys.stdout
+    if not _VENV.exists():
+        print("✗ Virtual environment not found", file=out)
         return False
     
     # Check if key dependencies are already installed
+    if _have_backend_deps():
+        print("✓ Backend dependencies already installed", file=out)
+        return True
+    
+    print("Installing backend dependencies...", file=out)
     try:
-        import fastapi
-        import uvicorn
-        print("✓ Backend dependencies already installed")
+        # The venv's own interpreter runs pip, so no shell or per-OS script path is needed
+        _run_captured([str(_VENV_PY), "-m", "pip", "install", "-r", "requirements.txt"], out)
+        print("✓ Backend dependencies installed", file=out)
         return True
-    except ImportError:
-        print("Installing backend dependencies...")
-        try:
-            if os.name == 'nt':  # Windows
-                subprocess.run("venv\\Scripts\\pip install -r requirements.txt", shell=True, check=True)
-            else:
-                subprocess.run(["venv/bin/pip", "install", "-r", "requirements.txt"], check=True)
-            print("✓ Backend dependencies installed")
-            return True
-        except subprocess.CalledProcessError:
-            print("✗ Failed to install backend dependencies")
-            return False
+    except subprocess.CalledProcessError:
+        print("✗ Failed to install backend dependencies", file=out)
+        return False
 
 def start_backend():
     """Start the backend server"""
     print("Starting backend server...")
     try: 
         # Check if we have a virtual environment and use it
-        venv_path = Path("venv")
         python_executable = sys.executable
         
-        if venv_path.exists():
+        if _VENV.exists():
             # Use the virtual environment's Python
-            if os.name == 'nt':  # Windows
-                venv_python = venv_path / "Scripts" / "python.exe"
-            else:  # Unix/Linux
-                venv_python = venv_path / "bin" / "python"
-            
-            if venv_python.exists():
-                python_executable = str(venv_python)
-                print(f"   Using virtual environment: {venv_python}")
+            if _VENV_PY.exists():
+                python_executable = str(_VENV_PY)
+                print(f"   Using virtual environment: {_VENV_PY}")
             else:
-                print(f"   Virtual environment found but Python not at expected path: {venv_python}")
+                print(f"   Virtual environment found but Python not at expected path: {_VENV_PY}")
         
         # Start the server from the root directory
+        # uvloop has no Windows build, so fall back to the asyncio loop there
+        loop = "asyncio" if _IS_WIN else "uvloop"
         backend_process = subprocess.Popen([
-            python_executable, "-m", "uvicorn", "app.main:app", "--host", "0.0.0.0", "--port", "8000"
-        ])
+            python_executable, "-m", "uvicorn", "app.main:app",
+            "--loop", loop, "--http", "httptools", "--ws", "websockets",
+            "--ws-per-message-deflate", "false",
+            "--no-access-log", "--no-proxy-headers", "--no-server-header", "--no-date-header",
+            "--host", "0.0.0.0", "--port", "8000"
+        ], start_new_session=True)
         
         print("✓ Backend server started (PID: {})".format(backend_process.pid))
         return backend_process
@@ -152,17 +219,12 @@ def start_frontend():
     """Start the frontend development server"""
     print("Starting frontend server...")
     try:
-        # Use shell=True on Windows for better PATH resolution
-        if os.name == 'nt':  # Windows
-            frontend_process = subprocess.Popen(
-                "npm run dev", 
-                cwd="frontend", 
-                shell=True
-            )
-        else:
-            frontend_process = subprocess.Popen([
-                "npm", "run", "dev"
-            ], cwd="frontend")
+        npm_path = _npm_path()
+        if npm_path is None:
+            print("✗ Failed to start frontend: npm not found")
+            return None
+        frontend_process = subprocess.Popen([npm_path, "run", "dev"], cwd=_FRONTEND,
+                                            start_new_session=True)
         
         print("✓ Frontend server started (PID: {})".format(frontend_process.pid))
         return frontend_process
@@ -170,46 +232,70 @@ def start_frontend():
         print(f"✗ Failed to start frontend: {e}")
         return None
 
-def wait_for_backend(max_attempts=30, delay=1):
-    """Wait for backend to be ready by polling the health endpoint"""
-    print("Waiting for backend to be ready...")
-    
-    for attempt in range(max_attempts):
+def _poll(url, timeout_s):
+    """Poll a URL until it answers 2xx/3xx, backing off from 50ms up to 2s between tries"""
+    deadline = time.monotonic() + timeout_s
+    attempt = 0
+    while True:
+        # A refused connection means nothing is listening yet, so retry quickly;
+        # anything else means the server is up but not ready, so back off
+        refused = False
         try:
-            response = requests.get("http://localhost:8000/health", timeout=2)
-            if response.status_code == 200:
-                print("✓ Backend is ready!")
+            # Vite answers 304/302 while it boots, which already means it is serving
+            response = _session.get(url, timeout=1, allow_redirects=False)
+            if 200 <= response.status_code < 400:
                 return True
-        except (requests.RequestException, requests.Timeout):
+        except requests.ConnectionError:
+            refused = True
+        except requests.RequestException:
             pass
         
-        if attempt < max_attempts - 1:
-            print(f"  Attempt {attempt + 1}/{max_attempts} - Backend not ready yet...")
-            time.sleep(delay)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or _stop_polling.is_set():
+            return False
+        if refused:
+            delay = min(0.05, remaining)
+        else:
+            delay = min(2.0, 0.05 * 2 ** attempt, remaining)
+            attempt += 1
+        if _stop_polling.wait(delay):
+            return False
+
+def wait_for_backend(timeout_s=30):
+    """Wait for backend to be ready by polling the health endpoint"""
+    if _poll(BACKEND_URL, timeout_s):
+        print("✓ Backend is ready!")
+        return True
+    if _stop_polling.is_set():
+        return False
     
     print("✗ Backend failed to start within expected time")
     return False
 
-def wait_for_frontend(max_attempts=30, delay=1):
+def wait_for_frontend(timeout_s=30):
     """Wait for frontend to be ready by polling the dev server"""
-    print("Waiting for frontend to be ready...")
-    
-    for attempt in range(max_attempts):
-        try:
-            response = requests.get("http://localhost:3000", timeout=2)
-            if response.status_code == 200:
-                print("✓ Frontend is ready!")
-                return True
-        except (requests.RequestException, requests.Timeout):
-            pass
-        
-        if attempt < max_attempts - 1:
-            print(f"  Attempt {attempt + 1}/{max_attempts} - Frontend not ready yet...")
-            time.sleep(delay)
+    if _poll(FRONTEND_URL, timeout_s):
+        print("✓ Frontend is ready!")
+        return True
+    if _stop_polling.is_set():
+        return False
     
     print("⚠️  Frontend may not be ready yet, but continuing...")
     return False
 
+def wait_for_servers(timeout_s=30):
+    """Wait for backend and frontend at the same time; returns both readiness flags"""
+    print("Waiting for servers to be ready...")
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        backend = pool.submit(wait_for_backend, timeout_s)
+        frontend = pool.submit(wait_for_frontend, timeout_s)
+        try:
+            return backend.result(), frontend.result()
+        except BaseException:
+            # Interrupted: let the pollers return so the pool can shut down now
+            _stop_polling.set()
+            raise
+
 def open_browser():
     """Open the Drum Trainer application in the default browser"""
     try:
@@ -220,76 +306,179 @@ def open_browser():
         print(f"⚠️  Could not open browser automatically: {e}")
         print("   Please manually open: http://localhost:3000")
 
+def wait_for_exit(*processes):
+    """Block until one of the processes exits and return it
+    
+    Uses pidfds where available (Linux 5.3+) so all processes are watched at
+    once; elsewhere falls back to waiting on each in turn.
+    """
+    try:
+        pidfds = {os.pidfd_open(process.pid): process for process in processes}
+    except (AttributeError, OSError):
+        for process in processes:
+            process.wait()
+        return processes[0]
+    
+    try:
+        ready, _, _ = select.select(list(pidfds), [], [])
+        process = pidfds[ready[0]]
+        process.wait()
+        return process
+    finally:
+        for pidfd in pidfds:
+            os.close(pidfd)
+
+def _still_running(process):
+    """Check whether a process is still running without reaping it"""
+    if not hasattr(os, "waitid"):
+        return process.poll() is None
+    try:
+        return os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is None
+    except ChildProcessError:
+        # Already reaped by Popen
+        return False
+
+def _signal_group(process, force=False):
+    """SIGTERM (or SIGKILL) a server's whole process group"""
+    if _IS_WIN:
+        # No process groups to signal; stop the process itself
+        if force:
+            process.kill()
+        else:
+            process.terminate()
+        return
+    # Servers are started in their own session, so their pid is the pgid
+    try:
+        os.killpg(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+
+def stop_process(process):
+    """Stop a server and anything it spawned, escalating to SIGKILL after 2s"""
+    if not _still_running(process):
+        # npm can exit and leave the node process it forked behind
+        if not _IS_WIN:
+            _signal_group(process)
+        process.wait()
+        return
+    
+    _signal_group(process)
+    try:
+        process.wait(timeout=2)
+    except subprocess.TimeoutExpired:
+        _signal_group(process, force=True)
+        process.wait()
+
+def stop_servers(*processes):
+    """Stop all given servers"""
+    for process in processes:
+        stop_process(process)
+
+def _exit_on_signal(signum, frame):
+    """Turn SIGTERM/SIGHUP into an exit that runs main()'s server cleanup"""
+    raise SystemExit(128 + signum)
+
+def _install_signal_handlers():
+    """Stop the servers on SIGTERM or a closed terminal, not just on Ctrl+C
+    
+    The servers run in their own sessions, so these signals no longer reach them.
+    """
+    for name in ("SIGTERM", "SIGHUP"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), _exit_on_signal)
+
+def _ignore_signals():
+    """Keep a second Ctrl+C or SIGTERM from cutting the server cleanup short"""
+    for name in ("SIGINT", "SIGTERM", "SIGHUP"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), signal.SIG_IGN)
+
 def main():
     """Main startup function"""
     print("🚀 Starting Drum Trainer Development Environment")
     print("=" * 50)
     
-    # Check dependencies
-    if not check_dependencies():
+    # Check dependencies; the frontend can't run at all without node and npm
+    backend_deps_ok = check_dependencies()
+    if not check_node_toolchain():
+        sys.exit(1)
+    
+    # pip and npm work in separate directories, so install both at once;
+    # each step's output is printed as one block when it finishes
+    with ThreadPoolExecutor(max_workers=2) as pool:
         # Try to install backend dependencies automatically
-        if not install_backend_deps():
-            print("Please install dependencies manually:")
-            print("  source venv/bin/activate  # or venv\\Scripts\\activate on Windows")
-            print("  pip install -r requirements.txt")
+        backend = None if backend_deps_ok else pool.submit(_buffered, install_backend_deps)
+        # Install frontend dependencies if needed
+        frontend = pool.submit(_buffered, install_frontend_deps)
+        
+        if backend is not None:
+            ok, output = backend.result()
+            print(output, end="")
+            if not ok:
+                print("Please install dependencies manually:")
+                print("  source venv/bin/activate  # or venv\\Scripts\\activate on Windows")
+                print("  pip install -r requirements.txt")
+                sys.exit(1)
+        
+        ok, output = frontend.result()
+        print(output, end="")
+        if not ok:
             sys.exit(1)
     
-    # Install frontend dependencies if needed
-    if not install_frontend_deps():
-        sys.exit(1)
-    
     print("\nStarting servers...")
     print("-" * 30)
     
+    _install_signal_handlers()
+    
     # Start backend
     backend_process = start_backend()
     if not backend_process:
         sys.exit(1)
     
-    # Wait for backend to be ready
-    if not wait_for_backend():
-        print("Stopping backend...")
-        backend_process.terminate()
-        sys.exit(1)
-    
-    # Start frontend
-    frontend_process = start_frontend()
-    if not frontend_process:
-        print("Stopping backend...")
-        backend_process.terminate()
-        sys.exit(1)
-    
-    # Wait for frontend to be ready
-    if wait_for_frontend():
-        # Small delay to ensure frontend is fully loaded
-        print("⏳ Waiting a moment for frontend to fully load...")
-        time.sleep(3)
-        # Open browser automatically
-        open_browser()
-    else:
-        print("💡 You can manually open: http://localhost:3000")
-    
-    print("\n" + "=" * 50)
-    print("🎯 Drum Trainer is starting up!")
-    print("Backend: http://localhost:8000")
-    print("Frontend: http://localhost:3000")
-    print("API Docs: http://localhost:8000/docs")
-    print("\nPress Ctrl+C to stop all servers")
-    print("=" * 50)
-    
+    # From here on, however the launcher exits, the servers are stopped with it
+    frontend_process = None
     try:
-        # Wait for processes to complete
-        backend_process.wait()
-        frontend_process.wait()
+        # Start frontend right away; it doesn't need the backend to boot
+        frontend_process = start_frontend()
+        if not frontend_process:
+            print("Stopping backend...")
+            sys.exit(1)
+        
+        # Wait for both servers to be ready
+        backend_ready, frontend_ready = wait_for_servers()
+        if not backend_ready:
+            print("Stopping servers...")
+            sys.exit(1)
+        
+        if frontend_ready:
+            # Small delay to ensure frontend is fully loaded
+            print("⏳ Waiting a moment for frontend to fully load...")
+            time.sleep(3)
+            # Open browser automatically
+            open_browser()
+        else:
+            print("💡 You can manually open: http://localhost:3000")
+        
+        print("\n" + "=" * 50)
+        print("🎯 Drum Trainer is starting up!")
+        print("Backend: http://localhost:8000")
+        print("Frontend: http://localhost:3000")
+        print("API Docs: http://localhost:8000/docs")
+        print("\nPress Ctrl+C to stop all servers")
+        print("=" * 50)
+        
+        # Stop everything as soon as either server exits
+        exited = wait_for_exit(backend_process, frontend_process)
+        name = "Backend" if exited is backend_process else "Frontend"
+        print(f"\n⚠️  {name} server exited (code {exited.returncode}), stopping...")
     except KeyboardInterrupt:
         print("\n\n🛑 Stopping servers...")
-        backend_process.terminate()
-        frontend_process.terminate()
-        print("✓ Servers stopped")
     except Exception as e:
         print(f"\nError: {e}")
-        backend_process.terminate()
-        frontend_process.terminate()
+    finally:
+        _ignore_signals()
+        stop_servers(*(process for process in (backend_process, frontend_process) if process))
+        print("✓ Servers stopped")
 
 if __name__ == "__main__":
     main()
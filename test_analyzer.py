@@ -4,14 +4,14 @@ Test script for the DrumAnalyzer
 """
 
 import time
-from models import Drill, HitEvent
-from analyzer import DrumAnalyzer
+import numpy as np
+import pytest
+from app.models import Drill, HitEvent, HitFeedback
+from app.analyzer import DrumAnalyzer
 
-def test_analyzer():
-    """Test the analyzer with a paradiddle drill"""
-    
-    # Create a paradiddle drill
-    drill = Drill(
+def make_drill() -> Drill:
+    """Paradiddle at 120 BPM in 16ths: 125ms per slot, 64 slots, accents on every 8th"""
+    return Drill(
         id="test_paradiddle",
         name="Test Paradiddle",
         tempo_bpm=120,
@@ -31,17 +31,29 @@ def test_analyzer():
             "bad_ms": 40
         }
     )
+
+def start_at(analyzer: DrumAnalyzer, monkeypatch, elapsed_ms: float):
+    """Pin the clock so the next hit lands exactly `elapsed_ms` into the session"""
+    analyzer.session_start_time = 1000.0
+    monkeypatch.setattr(time, "time", lambda: 1000.0 + elapsed_ms / 1000.0)
+
+def test_analyzer(monkeypatch):
+    """Test the analyzer with a paradiddle drill"""
+    
+    # Create a paradiddle drill
+    drill = make_drill()
     
     # Create analyzer
     analyzer = DrumAnalyzer(drill, client_offset_ms=0.0)
     
     print(f"Drill: {drill.name} at {drill.tempo_bpm} BPM")
-    print(f"Grid slots: {len(analyzer.grid_times)}")
-    print(f"Grid duration: {(analyzer.grid_times[-1] - analyzer.grid_times[0]) / 1000:.2f} seconds")
+    print(f"Grid slots: {analyzer.total_slots}")
+    print(f"Grid duration: {(analyzer.total_slots - 1) * analyzer.ms_per_subdivision / 1000:.2f} seconds")
     print()
     
     # Simulate some hits
-    base_time = time.perf_counter() * 1000.0
+    # Whole milliseconds from the integer clock, so every offset below is exact
+    base_time = time.perf_counter_ns() // 1_000_000
     
     # Perfect timing hits
     perfect_hits = [
@@ -56,23 +68,27 @@ def test_analyzer():
     ]
     
     print("Testing perfect timing hits:")
-    for i, (hit_time, velocity) in enumerate(perfect_hits):
-        hit = HitEvent(
-            t=hit_time,
-            type="midi",
-            note=38,  # Snare drum
-            velocity=velocity
-        )
-        
-        feedback = analyzer.process_midi_hit(hit)
-        print(f"  Hit {i+1}: Slot {feedback.slot_idx}, Delta: {feedback.delta_ms:+.1f}ms, "
-              f"Timing: {feedback.timing_score:.2f}, Dynamics: {feedback.dyn_score:.2f}")
+    ts = np.array([hit_time for hit_time, _ in perfect_hits], dtype=np.int64)
+    vels = np.array([velocity for _, velocity in perfect_hits], dtype=np.int16)
+    # The batch's newest hit lands at "now", so put now 1875ms into the session
+    start_at(analyzer, monkeypatch, 1875)
+    batch = analyzer.process_batch(ts, vels)
+    for i, feedback in enumerate(batch):
+        print(f"  Hit {i+1}: Slot {feedback['slot_idx']}, Delta: {feedback['delta_ms']:+.1f}ms, "
+              f"Timing: {feedback['timing_score']:.2f}, Dynamics: {feedback['dyn_score']:.2f}")
+    
+    assert [feedback["slot_idx"] for feedback in batch] == list(range(8, 16))
+    assert [feedback["velocity_target"] for feedback in batch] == [100, 40, 40, 40, 100, 40, 40, 40]
+    for feedback in batch:
+        assert feedback["delta_ms"] == pytest.approx(0.0, abs=1e-6)
+        assert feedback["timing_score"] == pytest.approx(1.0)
+        assert feedback["dyn_score"] == pytest.approx(1.0)
     
     print()
     print("Rolling scores:")
-    print(f"  Timing: {feedback.rolling['timing']:.3f}")
-    print(f"  Dynamics: {feedback.rolling['dynamics']:.3f}")
-    print(f"  Diamond: {feedback.rolling['diamond']:.3f}")
+    print(f"  Timing: {feedback['rolling']['timing']:.3f}")
+    print(f"  Dynamics: {feedback['rolling']['dynamics']:.3f}")
+    print(f"  Diamond: {feedback['rolling']['diamond']:.3f}")
     
     print()
     
@@ -80,27 +96,29 @@ def test_analyzer():
     print("Testing off-timing hits:")
     off_timing_hits = [
         (base_time + 2000 + 50, 100),   # 50ms late accent
-        (base_time + 2000 + 175 + 30, 40),  # 30ms early tap
-        (base_time + 2000 + 300 + 60, 40),  # 60ms late tap
+        (base_time + 2000 + 125 - 30, 40),  # 30ms early tap
+        (base_time + 2000 + 250 + 60, 40),  # 60ms late tap
     ]
     
-    for i, (hit_time, velocity) in enumerate(off_timing_hits):
-        hit = HitEvent(
-            t=hit_time,
-            type="midi",
-            note=38,
-            velocity=velocity
-        )
-        
-        feedback = analyzer.process_midi_hit(hit)
-        print(f"  Off-hit {i+1}: Slot {feedback.slot_idx}, Delta: {feedback.delta_ms:+.1f}ms, "
-              f"Timing: {feedback.timing_score:.2f}, Dynamics: {feedback.dyn_score:.2f}")
+    ts = np.array([hit_time for hit_time, _ in off_timing_hits], dtype=np.int64)
+    vels = np.array([velocity for _, velocity in off_timing_hits], dtype=np.int16)
+    start_at(analyzer, monkeypatch, 2310)
+    batch = analyzer.process_batch(ts, vels)
+    for i, feedback in enumerate(batch):
+        print(f"  Off-hit {i+1}: Slot {feedback['slot_idx']}, Delta: {feedback['delta_ms']:+.1f}ms, "
+              f"Timing: {feedback['timing_score']:.2f}, Dynamics: {feedback['dyn_score']:.2f}")
+    
+    assert [feedback["slot_idx"] for feedback in batch] == [16, 17, 18]
+    assert [feedback["delta_ms"] for feedback in batch] == pytest.approx([50.0, -30.0, 60.0], abs=1e-6)
+    # Past the 40ms poor threshold scores zero; 30ms is halfway down the ok-to-poor ramp
+    assert [feedback["timing_score"] for feedback in batch] == pytest.approx([0.0, 0.4, 0.0], abs=1e-6)
+    assert [feedback["dyn_score"] for feedback in batch] == pytest.approx([1.0, 1.0, 1.0])
     
     print()
     print("Final rolling scores:")
-    print(f"  Timing: {feedback.rolling['timing']:.3f}")
-    print(f"  Dynamics: {feedback.rolling['dynamics']:.3f}")
-    print(f"  Diamond: {feedback.rolling['diamond']:.3f}")
+    print(f"  Timing: {feedback['rolling']['timing']:.3f}")
+    print(f"  Dynamics: {feedback['rolling']['dynamics']:.3f}")
+    print(f"  Diamond: {feedback['rolling']['diamond']:.3f}")
     
     # Get final metrics
     final_metrics = analyzer.get_final_metrics()
@@ -113,6 +131,65 @@ def test_analyzer():
     print(f"  Dynamics std: {final_metrics.dynamics_std:.3f}")
     print(f"  Diamond score: {final_metrics.diamond_score:.3f}")
     print(f"  Missed slots: {final_metrics.missed_slots}")
+    
+    assert final_metrics.total_hits == 11
+    assert final_metrics.missed_slots == analyzer.total_slots - 11
+    assert final_metrics.dynamics_target == pytest.approx(1.0)
+    
+    # The single-hit path the WebSocket uses, 3s in: slot 24, an accent
+    start_at(analyzer, monkeypatch, 3000)
+    feedback = analyzer.process_midi_hit(HitEvent(t=0.0, type="midi", note=38, velocity=100))
+    assert isinstance(feedback, HitFeedback)
+    assert feedback.slot_idx == 24
+    assert feedback.velocity_target == 100
+    assert feedback.dyn_score == pytest.approx(1.0)
+    assert analyzer.get_final_metrics().total_hits == 12
+
+def test_batch_of_one_matches_single_hit(monkeypatch):
+    """A one-hit batch scores exactly like process_midi_hit_fast at the same session time"""
+    drill = make_drill()
+    single = DrumAnalyzer(drill)
+    batched = DrumAnalyzer(drill)
+    single.session_start_time = batched.session_start_time = 1000.0
+    monkeypatch.setattr(time, "time", lambda: 1000.0 + 2.31)
+    
+    expected = single.process_midi_hit_fast(0.0, 40)
+    (actual,) = batched.process_batch(np.array([0.0]), np.array([40]))
+    assert actual["slot_idx"] == expected["slot_idx"] == 18
+    assert actual["velocity_target"] == expected["velocity_target"]
+    assert actual["delta_ms"] == pytest.approx(expected["delta_ms"])
+    assert actual["timing_score"] == pytest.approx(expected["timing_score"])
+    assert actual["dyn_score"] == pytest.approx(expected["dyn_score"])
+    assert actual["rolling"] == pytest.approx(expected["rolling"])
+
+def test_batch_kernel_matches_single_hit_path(monkeypatch):
+    """score_hits agrees with _find_nearest_slot and the scalar scorers across wraps and velocities"""
+    drill = make_drill()
+    drill.accents = [1, 0, 0]  # a pattern that doesn't divide the grid
+    single = DrumAnalyzer(drill)
+    batched = DrumAnalyzer(drill)
+    single.session_start_time = batched.session_start_time = 1000.0
+    
+    # Three passes over the grid, at times that avoid the exact slot midpoints
+    rng = np.random.default_rng(0)
+    elapsed_ms = np.sort(rng.uniform(0.0, 3 * 7875.0 + 500.0, 500))
+    velocities = rng.integers(0, 128, 500)
+    
+    expected = []
+    for elapsed, velocity in zip(elapsed_ms.tolist(), velocities.tolist()):
+        monkeypatch.setattr(time, "time", lambda elapsed=elapsed: 1000.0 + elapsed / 1000.0)
+        expected.append(single.process_midi_hit_fast(elapsed, velocity))
+    
+    # The newest hit lands at "now" and the rest by their offsets from it
+    monkeypatch.setattr(time, "time", lambda: 1000.0 + elapsed_ms[-1] / 1000.0)
+    actual = batched.process_batch(elapsed_ms, velocities)
+    
+    assert [hit["slot_idx"] for hit in actual] == [hit["slot_idx"] for hit in expected]
+    assert [hit["velocity_target"] for hit in actual] == [hit["velocity_target"] for hit in expected]
+    for key in ("delta_ms", "timing_score", "dyn_score"):
+        assert [hit[key] for hit in actual] == pytest.approx([hit[key] for hit in expected], abs=1e-6)
+    assert actual[-1]["rolling"] == pytest.approx(expected[-1]["rolling"], abs=1e-6)
 
 if __name__ == "__main__":
-    test_analyzer()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_analyzer(monkeypatch)